@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import BackfillProgress
+
+
+@admin.register(BackfillProgress)
+class BackfillProgressAdmin(admin.ModelAdmin):
+    list_display = ("name", "rows_done", "last_pk", "completed_at", "updated_at")
+    search_fields = ("name",)
@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class BackfillProgress(models.Model):
+    """Checkpoint of a named backfill, written in the same transaction as each chunk."""
+    name = models.CharField(max_length=100, unique=True)
+    last_pk = models.CharField(max_length=64, blank=True)
+    rows_done = models.PositiveBigIntegerField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,58 @@
+import time
+
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.utils import timezone
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def run_backfill(name, queryset, update, fields, *, chunk_size=DEFAULT_CHUNK_SIZE,
+                 apps=None, stdout=None, restart=False):
+    """
+    Apply `update(obj)` to every row of `queryset` in primary-key order and
+    `bulk_update` the given `fields`, committing one chunk per transaction.
+    `update` may return False to leave a row untouched.
+
+    Progress is checkpointed under `name` together with each chunk, so a
+    rerun resumes after the last committed chunk and a finished backfill is
+    a no-op (unless `restart`). From RunPython, pass the migration's `apps`
+    and declare `atomic = False` on the migration so chunks really commit.
+    Returns the number of rows processed in this run.
+    """
+    Progress = (apps or global_apps).get_model("backfill", "BackfillProgress")
+    model = queryset.model
+    db = queryset.db
+
+    progress, _ = Progress.objects.using(db).get_or_create(name=name)
+    if restart:
+        progress.last_pk, progress.rows_done, progress.completed_at = "", 0, None
+        progress.save(using=db)
+    if progress.completed_at:
+        return 0
+
+    last_pk = model._meta.pk.to_python(progress.last_pk) if progress.last_pk else None
+    ordered = queryset.order_by("pk")
+    started = time.monotonic()
+    processed = 0
+    while True:
+        pending = ordered if last_pk is None else ordered.filter(pk__gt=last_pk)
+        chunk = list(pending[:chunk_size])
+        if not chunk:
+            break
+        changed = [obj for obj in chunk if update(obj) is not False]
+        last_pk = chunk[-1].pk
+        with transaction.atomic(using=db):
+            if changed:
+                model._base_manager.using(db).bulk_update(changed, fields)
+            progress.last_pk = str(last_pk)
+            progress.rows_done += len(chunk)
+            progress.save(using=db, update_fields=["last_pk", "rows_done", "updated_at"])
+        processed += len(chunk)
+        if stdout:
+            rate = processed / max(time.monotonic() - started, 1e-6)
+            stdout.write(f"  {name}: {progress.rows_done} rows ({rate:.0f} rows/s)\n")
+
+    progress.completed_at = timezone.now()
+    progress.save(using=db, update_fields=["completed_at", "updated_at"])
+    return processed
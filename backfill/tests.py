@@ -0,0 +1,80 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from news.models import News
+from .models import BackfillProgress
+from .runner import run_backfill
+
+
+class RunBackfillTests(TestCase):
+    def setUp(self):
+        News.objects.all().delete()
+        for i in range(7):
+            News.objects.create(title=f"N{i}", category="Cat", publish_date="09 Okt 2025", content="x")
+        News.objects.update(published_month=None)
+        self.ordered_ids = list(News.objects.order_by("pk").values_list("pk", flat=True))
+
+    def test_updates_all_rows_in_chunks_and_reports_rate(self):
+        out = StringIO()
+
+        def set_month(n):
+            n.published_month = 10
+
+        processed = run_backfill("t.month", News.objects.all(), set_month, ["published_month"], chunk_size=3, stdout=out)
+        self.assertEqual(processed, 7)
+        self.assertFalse(News.objects.filter(published_month__isnull=True).exists())
+        self.assertEqual(out.getvalue().count("rows/s"), 3)
+        progress = BackfillProgress.objects.get(name="t.month")
+        self.assertEqual(progress.rows_done, 7)
+        self.assertIsNotNone(progress.completed_at)
+        self.assertEqual(run_backfill("t.month", News.objects.all(), set_month, ["published_month"]), 0)
+
+    def test_resumes_after_last_committed_chunk(self):
+        poison = {self.ordered_ids[4]}
+        seen = []
+
+        def set_month(n):
+            if n.pk in poison:
+                raise RuntimeError("boom")
+            seen.append(n.pk)
+            n.published_month = 10
+
+        with self.assertRaises(RuntimeError):
+            run_backfill("t.resume", News.objects.all(), set_month, ["published_month"], chunk_size=3)
+        self.assertEqual(BackfillProgress.objects.get(name="t.resume").last_pk, str(self.ordered_ids[2]))
+        self.assertEqual(News.objects.filter(published_month=10).count(), 3)
+
+        poison.clear()
+        seen.clear()
+        processed = run_backfill("t.resume", News.objects.all(), set_month, ["published_month"], chunk_size=3)
+        self.assertEqual(processed, 4)
+        self.assertEqual(seen, self.ordered_ids[3:])
+        self.assertEqual(News.objects.filter(published_month=10).count(), 7)
+
+    def test_skipped_rows_are_not_written(self):
+        def only_first(n):
+            if n.pk != self.ordered_ids[0]:
+                return False
+            n.published_month = 1
+
+        run_backfill("t.skip", News.objects.all(), only_first, ["published_month"])
+        self.assertEqual(News.objects.filter(published_month=1).count(), 1)
+
+    def test_refresh_news_fields_command_reruns_after_completion(self):
+        out = StringIO()
+        call_command("refresh_news_fields", stdout=out)
+        self.assertEqual(News.objects.filter(published_month=10).count(), 7)
+        News.objects.update(published_month=None)
+        call_command("refresh_news_fields", stdout=out)
+        self.assertEqual(News.objects.filter(published_month=10).count(), 7)
+
+    def test_refresh_news_fields_bumps_updated_at_of_changed_rows_only(self):
+        call_command("refresh_news_fields", stdout=StringIO())
+        stamps = dict(News.objects.values_list("pk", "updated_at"))
+        News.objects.filter(pk=self.ordered_ids[0]).update(excerpt="stale")
+        call_command("refresh_news_fields", stdout=StringIO())
+        after = dict(News.objects.values_list("pk", "updated_at"))
+        self.assertGreater(after.pop(self.ordered_ids[0]), stamps.pop(self.ordered_ids[0]))
+        self.assertEqual(after, stamps)
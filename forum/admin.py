@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Post, Comment
+from .models import Category, Post, Comment, PostLike, DailyActivity
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -10,7 +10,7 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('title', 'author_name', 'category', 'status', 'created_at', 'like_count')
+    list_display = ('title', 'author_name', 'category', 'status', 'created_at', 'like_count', 'comment_count')
     list_filter = ('status', 'category', 'created_at')
     search_fields = ('title', 'body', 'author_name')
     prepopulated_fields = {'slug': ('title',)}
@@ -23,3 +23,16 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ('author_name', 'post', 'created_at')
     search_fields = ('author_name', 'body')
     list_filter = ('created_at',)
+
+
+@admin.register(PostLike)
+class PostLikeAdmin(admin.ModelAdmin):
+    list_display = ('user', 'post', 'created_at')
+    raw_id_fields = ('user', 'post')
+
+
+@admin.register(DailyActivity)
+class DailyActivityAdmin(admin.ModelAdmin):
+    list_display = ('day', 'category', 'posts', 'comments', 'likes')
+    list_filter = ('category',)
+    date_hierarchy = 'day'
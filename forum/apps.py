@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 
 class ForumConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'forum'
\ No newline at end of file
+    name = 'forum'
+
+    def ready(self):
+        from .categories import invalidate_categories, seed_categories
+        from .models import Category
+        from .search import ensure_search_index
+        post_migrate.connect(ensure_search_index, sender=self)
+        post_migrate.connect(seed_categories, sender=self)
+        post_save.connect(invalidate_categories, sender=Category, dispatch_uid="forum_categories_save")
+        post_delete.connect(invalidate_categories, sender=Category, dispatch_uid="forum_categories_delete")
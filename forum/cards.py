@@ -0,0 +1,32 @@
+"""
+Rendered forum cards, cached per post version. The version is read off the
+row itself (updated_at, like/comment counts, category name), so an edit or
+a like produces a new key and stale entries simply age out. Cards carry no
+per-user state; the viewer's liked posts are applied client-side from
+`liked_ids`.
+"""
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+CARD_TEMPLATE = "forum/_post_card.html"
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def card_cache_key(post):
+    return make_template_fragment_key("forum_card", [
+        post.pk, post.updated_at.isoformat(), post.like_count, post.comment_count, post.category.name,
+    ])
+
+
+def render_cards(posts):
+    keys = {post.pk: card_cache_key(post) for post in posts}
+    cards = cache.get_many(keys.values())
+    missing = {keys[p.pk]: p for p in posts if keys[p.pk] not in cards}
+    if missing:
+        template = get_template(CARD_TEMPLATE)
+        rendered = {key: template.render({"p": post}) for key, post in missing.items()}
+        cache.set_many(rendered, CARD_CACHE_TIMEOUT)
+        cards.update(rendered)
+    return mark_safe("".join(cards[keys[p.pk]] for p in posts))
@@ -0,0 +1,51 @@
+"""
+Per-process registry of forum categories. Categories are tiny and almost
+never change, so each process keeps them in memory, stamped with a
+generation number held in the shared cache. Saving or deleting a Category
+bumps the generation (see ForumConfig.ready), and every process reloads on
+its next read. A slug the registry doesn't know yet falls back to the DB.
+"""
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import router
+
+from .models import Category
+
+CATEGORY_FIXTURE = "forum_categories"
+GENERATION_KEY = "forum:categories:generation"
+
+_state = {"generation": None, "categories": None}
+
+
+def all_categories():
+    generation = cache.get(GENERATION_KEY, 0)
+    if _state["categories"] is None or _state["generation"] != generation:
+        _state["categories"], _state["generation"] = tuple(Category.objects.all()), generation
+    return _state["categories"]
+
+
+def get_category(slug):
+    category = next((c for c in all_categories() if c.slug == slug), None)
+    if category is None:
+        category = Category.objects.filter(slug=slug).first()
+        if category is not None:  # created since this registry was loaded
+            _state["categories"] = None
+    return category
+
+
+def invalidate_categories(**kwargs):
+    if not cache.add(GENERATION_KEY, 1, None):
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:  # evicted between add and incr
+            cache.add(GENERATION_KEY, 1, None)
+    _state["categories"] = None
+
+
+def seed_categories(using="default", **kwargs):
+    """post_migrate hook: load forum/fixtures/forum_categories.json into an empty table."""
+    if not router.allow_migrate_model(using, Category):
+        return
+    if not Category.objects.using(using).exists():
+        call_command("loaddata", CATEGORY_FIXTURE, app_label="forum", database=using, verbosity=0)
+    invalidate_categories()
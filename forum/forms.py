@@ -5,6 +5,7 @@ from .models import Post, Comment, Category
 class PostFilterForm(forms.Form):
     q = forms.CharField(required=False)
     category = forms.CharField(required=False)
+    sort = forms.ChoiceField(required=False, choices=[("new", "Terbaru"), ("hot", "Populer")])
 
 class PostForm(forms.ModelForm):
     category = forms.ModelChoiceField(queryset=Category.objects.all())
@@ -0,0 +1,73 @@
+"""
+Like counting. By default a like updates Post.like_count in place. With
+settings.FORUM_LIKE_SHARDS = N > 0, it adds to one of N LikeShard rows
+for (post, day) picked at random instead, so concurrent likes on a hot
+post contend on N rows rather than one. `fold_like_shards` periodically
+moves the pending deltas into Post.like_count, the hot score and the daily
+rollups. Lists and cached cards show the folded count; the like endpoint
+answers with the live total.
+"""
+import random
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+
+from .models import LikeShard, Post
+from .stats import record_activity
+
+
+def shard_count():
+    return max(getattr(settings, "FORUM_LIKE_SHARDS", 0), 0)
+
+
+def add_like(post, day, delta):
+    """Apply a like (+1) or unlike (-1) made on a like created on `day`; returns the live total."""
+    shards = shard_count()
+    if not shards:
+        like_count = Post.adjust_counter(post.pk, "like_count", delta)
+        record_activity(day, post.category_id, likes=delta)
+        return like_count
+
+    key = {"post_id": post.pk, "day": day, "shard": random.randrange(shards)}
+    rows = LikeShard.objects.filter(**key)
+    if not rows.update(count=F("count") + delta):
+        try:
+            with transaction.atomic():
+                LikeShard.objects.create(count=delta, **key)
+        except IntegrityError:  # created concurrently
+            rows.update(count=F("count") + delta)
+    return like_total(post.pk)
+
+
+def like_total(post_id):
+    row = (
+        Post.objects.filter(pk=post_id)
+        .annotate(pending=Coalesce(Sum("like_shards__count"), 0))
+        .values_list("like_count", "pending").first()
+    )
+    return max(sum(row), 0) if row else None
+
+
+def fold_like_shards():
+    """Move every pending shard delta into its post and the rollups. Returns posts touched."""
+    with transaction.atomic():
+        rows = list(
+            LikeShard.objects.select_for_update(of=("self",))
+            .values_list("id", "post_id", "post__category_id", "day", "count")
+        )
+        per_post, per_day = Counter(), Counter()
+        for _, post_id, category_id, day, count in rows:
+            per_post[post_id] += count
+            per_day[day, category_id] += count
+        for post_id, delta in per_post.items():
+            if delta:
+                Post.adjust_counter(post_id, "like_count", delta)
+        for (day, category_id), delta in per_day.items():
+            record_activity(day, category_id, likes=delta)
+        ids = [row[0] for row in rows]
+        for i in range(0, len(ids), 500):
+            LikeShard.objects.filter(id__in=ids[i:i + 500]).delete()
+    return len(per_post)
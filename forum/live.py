@@ -0,0 +1,104 @@
+"""
+Server-Sent Events for new forum comments.
+
+Each stream polls `Comment.id > last_id` for its post (an indexed since-id
+query) and sleeps on an in-process hub between polls. comment_create
+publishes to the hub on commit, so streams served by the same process wake
+immediately; streams in other processes pick the comment up on their next
+poll. Streams end after STREAM_MAX_SECONDS and the browser's EventSource
+reconnects with Last-Event-ID, so no connection lives forever.
+
+A stream spends nearly all its time asleep, so each poll gives its DB
+connection back instead of holding one for the life of the stream. Streams
+need ASGI: under WSGI each one would pin a worker, so comment_stream answers
+204 there, which tells EventSource to stop reconnecting.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.template.loader import render_to_string
+
+from .models import Comment
+
+POLL_SECONDS = 15
+STREAM_MAX_SECONDS = 300
+RETRY_MS = 3000
+BATCH_SIZE = 50
+
+
+class CommentHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = defaultdict(set)
+
+    def subscribe(self, post_id):
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters[post_id].add(waiter)
+        return waiter
+
+    def unsubscribe(self, post_id, waiter):
+        with self._lock:
+            waiters = self._waiters.get(post_id)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[post_id]
+
+    def publish(self, post_id):
+        """Wake every stream on `post_id`; safe to call from any thread."""
+        with self._lock:
+            waiters = list(self._waiters.get(post_id, ()))
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # loop already closed
+                pass
+
+
+hub = CommentHub()
+
+
+def _render_events(request, comments):
+    return "".join(
+        "id: {}\nevent: comment\ndata: {}\n\n".format(
+            c.id, json.dumps({"html": render_to_string("forum/_comment.html", {"c": c}, request=request)})
+        )
+        for c in comments
+    )
+
+
+def _poll(request, post_id, last_id):
+    """Fetch and render the next batch of comments: (new last_id, count, events)."""
+    try:
+        comments = list(Comment.objects.filter(post_id=post_id, id__gt=last_id).order_by("id")[:BATCH_SIZE])
+        return (comments[-1].id if comments else last_id), len(comments), _render_events(request, comments)
+    finally:
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+async def comment_events(request, post_id, last_id):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_MAX_SECONDS
+    waiter = hub.subscribe(post_id)
+    event = waiter[1]
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while loop.time() < deadline:
+            event.clear()
+            last_id, count, events = await sync_to_async(_poll)(request, post_id, last_id)
+            if count:
+                yield events
+                if count == BATCH_SIZE:
+                    continue
+            try:
+                await asyncio.wait_for(event.wait(), min(POLL_SECONDS, max(deadline - loop.time(), 0)))
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+    finally:
+        hub.unsubscribe(post_id, waiter)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from forum.likes import fold_like_shards
+
+
+class Command(BaseCommand):
+    help = "Fold pending LikeShard deltas into Post.like_count, hot scores and daily rollups."
+
+    def handle(self, *args, **options):
+        posts = fold_like_shards()
+        self.stdout.write(self.style.SUCCESS(f"Folded likes for {posts} posts"))
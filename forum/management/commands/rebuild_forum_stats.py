@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from forum.stats import rebuild_daily_activity
+
+
+class Command(BaseCommand):
+    help = "Recompute the DailyActivity rollups from every post, comment and like, in pk-range chunks."
+
+    def handle(self, *args, **options):
+        rows = rebuild_daily_activity(stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily activity rows"))
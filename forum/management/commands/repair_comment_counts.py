@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from forum.models import Comment, Post, hot_score
+
+CHUNK = 500
+
+
+def actual_comment_count():
+    counts = (
+        Comment.objects.filter(post=OuterRef("pk")).order_by()
+        .values("post").annotate(n=Count("id")).values("n")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def rescore(ids):
+    """Recompute hot_score for the given posts from their current counters."""
+    for i in range(0, len(ids), CHUNK):
+        posts = list(Post.objects.filter(pk__in=ids[i:i + CHUNK]).only("id", "like_count", "comment_count", "created_at"))
+        for post in posts:
+            post.hot_score = hot_score(post.like_count, post.comment_count, post.created_at)
+        Post.objects.bulk_update(posts, ["hot_score"])
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.comment_count from the comments table in bulk UPDATEs and rescore the repaired posts."
+
+    def handle(self, *args, **options):
+        ids = list(
+            Post.objects.annotate(actual=actual_comment_count())
+            .exclude(comment_count=F("actual")).values_list("pk", flat=True)
+        )
+        for i in range(0, len(ids), CHUNK):
+            Post.objects.filter(pk__in=ids[i:i + CHUNK]).update(comment_count=actual_comment_count())
+        rescore(ids)
+        self.stdout.write(self.style.SUCCESS(f"Repaired comment_count on {len(ids)} posts"))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from backfill.models import BackfillProgress
+from backfill.runner import DEFAULT_CHUNK_SIZE, run_backfill
+from forum.models import Post, hot_score
+
+BACKFILL_NAME = "forum.hot_score"
+
+
+def _rescore(post):
+    score = hot_score(post.like_count, post.comment_count, post.created_at)
+    if score == post.hot_score:
+        return False
+    post.hot_score = score
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Post.hot_score for every post in pk-ordered chunks. Likes and comments "
+        "keep it current; run this periodically (or after changing the formula) to repair drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        # An interrupted run resumes from its checkpoint; a finished one starts over.
+        finished = BackfillProgress.objects.filter(name=BACKFILL_NAME, completed_at__isnull=False).exists()
+        processed = run_backfill(
+            BACKFILL_NAME,
+            Post.objects.only("id", "like_count", "comment_count", "created_at", "hot_score"),
+            _rescore,
+            ["hot_score"],
+            chunk_size=max(1, options["chunk_size"]),
+            stdout=self.stdout,
+            restart=finished,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rescored {processed} posts"))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:23
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_count(apps, schema_editor):
+    Post = apps.get_model("forum", "Post")
+    Comment = apps.get_model("forum", "Comment")
+    counts = (
+        Comment.objects.filter(post=OuterRef("pk")).order_by()
+        .values("post").annotate(n=Count("id")).values("n")
+    )
+    Post.objects.update(comment_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0003_postlike'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_comment_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# PostgreSQL only: a generated, weighted tsvector plus a GIN index. SQLite gets
+# an FTS5 shadow table from forum.search.ensure_search_index (post_migrate).
+PG_FORWARD = [
+    """
+    ALTER TABLE forum_post ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(excerpt, '')), 'B') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(body, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX forum_post_search_gin ON forum_post USING GIN (search_vector)",
+]
+PG_REVERSE = [
+    "DROP INDEX IF EXISTS forum_post_search_gin",
+    "ALTER TABLE forum_post DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            for sql in statements:
+                schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0004_post_comment_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(PG_FORWARD), _run(PG_REVERSE)),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0008_dailyactivity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LikeShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='like_shards', to='forum.post')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('post', 'day', 'shard'), name='forum_likeshard_unique')],
+            },
+        ),
+    ]
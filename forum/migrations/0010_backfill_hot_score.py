@@ -0,0 +1,34 @@
+from django.db import migrations
+
+from backfill.runner import run_backfill
+from forum.models import hot_score
+
+
+def backfill_hot_score(apps, schema_editor):
+    Post = apps.get_model("forum", "Post")
+
+    def rescore(post):
+        post.hot_score = hot_score(post.like_count, post.comment_count, post.created_at)
+
+    run_backfill(
+        "forum.0010_backfill_hot_score",
+        Post.objects.only("id", "like_count", "comment_count", "created_at"),
+        rescore,
+        ["hot_score"],
+        apps=apps,
+    )
+
+
+class Migration(migrations.Migration):
+
+    # run_backfill commits one chunk per transaction and resumes from its checkpoint.
+    atomic = False
+
+    dependencies = [
+        ('forum', '0009_likeshard'),
+        ('backfill', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_hot_score, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,22 @@
 # forum/models.py
-from django.db import models
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, models
+from django.utils import timezone
 from django.utils.text import slugify
 from django.db.models import F
 
+HOT_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+HOT_DECAY_SECONDS = 45000   # a post 12.5h newer needs 10x less engagement to rank equal
+HOT_COMMENT_WEIGHT = 2
+
+def hot_score(like_count, comment_count, created_at):
+    """log-engagement plus creation time: decay is implicit, so a score only changes on activity."""
+    engagement = like_count + HOT_COMMENT_WEIGHT * comment_count
+    return round(math.log10(engagement + 1) + (created_at - HOT_EPOCH).total_seconds() / HOT_DECAY_SECONDS, 7)
+
 class Category(models.Model):
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=60, unique=True)
@@ -12,6 +26,12 @@ class Category(models.Model):
         super().save(*args, **kwargs)
     def __str__(self): return self.name
 
+# On PostgreSQL, forum_post also has a `search_vector` GENERATED column (title,
+# excerpt, body) and its GIN index, created by raw SQL in migration 0005 and kept
+# out of the model state (SQLite uses FTS5 instead; see forum.search). PostgreSQL
+# refuses to ALTER a column a generated column depends on, so a migration that
+# alters title/excerpt/body must first run 0005's PG_REVERSE statements and then
+# PG_FORWARD again after the AlterField (both PostgreSQL-only, in RunPython).
 class Post(models.Model):
     DRAFT, PUBLISHED = "draft", "published"
     STATUS_CHOICES = [(DRAFT, "Draft"), (PUBLISHED, "Published")]
@@ -26,22 +46,124 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    hot_score = models.FloatField(default=0, editable=False)
     
 
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields=["status", "created_at"])]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["status", "-hot_score"]),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug: self.slug = slugify(self.title)[:220]
         if not self.excerpt: self.excerpt = (self.body or "")[:220]
+        self.hot_score = hot_score(self.like_count, self.comment_count, self.created_at or timezone.now())
         super().save(*args, **kwargs)
     def __str__(self): return self.title
 
+    @classmethod
+    def adjust_counter(cls, pk, field, delta):
+        """
+        Atomically add `delta` (floored at 0) to like_count/comment_count, recompute
+        hot_score in the same UPDATE, and return the counter's new value.
+        """
+        qn = connection.ops.quote_name
+        table, col = qn(cls._meta.db_table), qn(cls._meta.get_field(field).column)
+        new_value = f"CASE WHEN {col} + %s < 0 THEN 0 ELSE {col} + %s END"
+        age = cls._hot_age_sql(qn("created_at"))
+        if age is None:  # no SQL for the time term on this backend
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {table} SET {col} = {new_value} WHERE id = %s RETURNING {col}", [delta, delta, pk]
+                )
+                row = cursor.fetchone()
+            cls.refresh_hot_score(pk)
+            return row[0] if row else None
+
+        counts = {f: qn(f) for f in ("like_count", "comment_count")}
+        counts[field] = new_value  # SET expressions see the old row, so restate the new count
+        engagement = f"({counts['like_count']}) + {HOT_COMMENT_WEIGHT} * ({counts['comment_count']}) + 1"
+        score = f"ROUND(CAST(LN({engagement}) / LN(10) + {age[0]} / {HOT_DECAY_SECONDS} AS NUMERIC), 7)"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET {col} = {new_value}, {qn('hot_score')} = {score} WHERE id = %s RETURNING {col}",
+                [delta, delta, delta, delta, *age[1], pk],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _hot_age_sql(created_col):
+        """(sql, params) for seconds between HOT_EPOCH and `created_col`, or None if unsupported."""
+        if connection.vendor == "postgresql":
+            return f"EXTRACT(EPOCH FROM ({created_col} - %s))", [HOT_EPOCH]
+        if connection.vendor == "sqlite":
+            return f"((julianday({created_col}) - julianday(%s)) * 86400.0)", [HOT_EPOCH.strftime("%Y-%m-%d %H:%M:%S")]
+        return None
+
+    @classmethod
+    def refresh_hot_score(cls, pk):
+        """Recompute one post's hot_score from its row; rescore_hot_posts repairs any race."""
+        row = cls.objects.filter(pk=pk).values_list("like_count", "comment_count", "created_at").first()
+        if row:
+            cls.objects.filter(pk=pk).update(hot_score=hot_score(*row))
+
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
     author_name = models.CharField(max_length=80, default="Orang")
     body = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
-    class Meta: ordering = ["created_at"]
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [models.Index(fields=["post", "created_at"])]
     def __str__(self): return f"Comment by {self.author_name}"
+
+class PostLike(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="post_likes")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="likes")
+    created_at = models.DateTimeField(auto_now_add=True)
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "post"], name="forum_postlike_unique")]
+    def __str__(self): return f"{self.user_id} likes {self.post_id}"
+
+    @classmethod
+    def remove(cls, user_id, post_id):
+        """DELETE ... RETURNING created_at: when the removed like was made, or None if there was none."""
+        field = cls._meta.get_field("created_at")
+        table, col = connection.ops.quote_name(cls._meta.db_table), connection.ops.quote_name(field.column)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE user_id = %s AND post_id = %s RETURNING {col}", [user_id, post_id]
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        value = row[0]
+        for converter in connection.ops.get_db_converters(field.cached_col):
+            value = converter(value, field.cached_col, connection)
+        return value
+
+class DailyActivity(models.Model):
+    """Per-day, per-category rollup maintained by forum.stats; rebuild with rebuild_forum_stats."""
+    day = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="daily_activity")
+    posts = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    likes = models.PositiveIntegerField(default=0)
+    class Meta:
+        ordering = ["day"]
+        constraints = [models.UniqueConstraint(fields=["day", "category"], name="forum_dailyactivity_unique")]
+    def __str__(self): return f"{self.day} {self.category_id}"
+
+class LikeShard(models.Model):
+    """Pending like deltas when FORUM_LIKE_SHARDS > 0; folded into Post.like_count by fold_like_shards."""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="like_shards")
+    day = models.DateField()
+    shard = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["post", "day", "shard"], name="forum_likeshard_unique")]
+    def __str__(self): return f"{self.post_id}/{self.day}/{self.shard}: {self.count}"
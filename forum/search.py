@@ -0,0 +1,90 @@
+"""
+Full-text search over published posts.
+
+PostgreSQL: a generated, weighted `search_vector` tsvector column with a GIN
+index (migration 0005), ranked with ts_rank.
+SQLite: an external-content FTS5 table kept in sync by triggers, ranked with
+bm25. Django rebuilds SQLite tables on most ALTERs, which drops triggers, so
+`ensure_search_index` (re)installs them after every migrate.
+Other backends fall back to icontains.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "forum_post_fts"
+SEARCH_CONFIG = "simple"  # posts are mostly Indonesian; no stemming
+TITLE_WEIGHT, EXCERPT_WEIGHT, BODY_WEIGHT = 10.0, 4.0, 1.0
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+        USING fts5(title, excerpt, body, content='forum_post', content_rowid='id')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON forum_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, excerpt, body)
+        VALUES (new.id, new.title, new.excerpt, new.body);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON forum_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, excerpt, body)
+        VALUES ('delete', old.id, old.title, old.excerpt, old.body);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, excerpt, body ON forum_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, excerpt, body)
+        VALUES ('delete', old.id, old.title, old.excerpt, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, title, excerpt, body)
+        VALUES (new.id, new.title, new.excerpt, new.body);
+    END""",
+]
+
+
+def ensure_search_index(using="default", **kwargs):
+    """post_migrate hook: install the SQLite FTS table/triggers, rebuilding if any were missing."""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        names = [FTS_TABLE] + [f"{FTS_TABLE}_{suffix}" for suffix in ("ai", "ad", "au")]
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name IN (%s, %s, %s, %s)", names
+        )
+        if cursor.fetchone()[0] == len(names):
+            return
+        for statement in SQLITE_DDL:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def search_terms(q):
+    return _TOKEN_RE.findall(q or "")[:16]
+
+
+def search_posts(qs, q):
+    """Filter `qs` to posts matching every term of `q` (prefix match), best matches first."""
+    terms = search_terms(q)
+    if not terms:
+        return qs.none()
+    vendor = connections[qs.db].vendor
+
+    if vendor == "postgresql":
+        tsquery = " & ".join(f"{t}:*" for t in terms)
+        match = f"to_tsquery('{SEARCH_CONFIG}', %s)"
+        qs = qs.filter(RawSQL(f"forum_post.search_vector @@ {match}", [tsquery], output_field=BooleanField()))
+        rank = RawSQL(f"ts_rank(forum_post.search_vector, {match})", [tsquery], output_field=FloatField())
+    elif vendor == "sqlite":
+        fts_query = " ".join('"{}"*'.format(t) for t in terms)
+        qs = qs.filter(pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [fts_query]))
+        # bm25 is "lower is better"; negate so both backends sort by -rank.
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, {TITLE_WEIGHT}, {EXCERPT_WEIGHT}, {BODY_WEIGHT}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = forum_post.id",
+            [fts_query], output_field=FloatField(),
+        )
+    else:
+        for t in terms:
+            qs = qs.filter(Q(title__icontains=t) | Q(body__icontains=t) | Q(excerpt__icontains=t))
+        return qs.order_by("-created_at", "-id")
+
+    return qs.annotate(rank=rank).order_by("-rank", "-created_at", "-id")
@@ -0,0 +1,115 @@
+"""
+Daily forum activity rollups. Views call `record_activity` on every
+create/like/delete so DailyActivity always mirrors the live rows: an event is
+counted on the (local) day the post/comment/like was created, and deleting it
+decrements that same day. `rebuild_daily_activity` recomputes the table from
+history in pk-range chunks, leaving out likes still pending in LikeShard rows
+(fold_like_shards adds those when it folds them).
+"""
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Sum, Value
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from .models import Comment, DailyActivity, LikeShard, Post, PostLike
+
+REBUILD_CHUNK = 10000
+METRICS = ("posts", "comments", "likes")
+
+
+def record_activity(day, category_id, **deltas):
+    updates = {
+        metric: Greatest(F(metric) + delta, Value(0)) if delta < 0 else F(metric) + delta
+        for metric, delta in deltas.items() if delta
+    }
+    if not updates:
+        return
+    rows = DailyActivity.objects.filter(day=day, category_id=category_id)
+    if rows.update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            DailyActivity.objects.create(
+                day=day, category_id=category_id, **{m: max(d, 0) for m, d in deltas.items()}
+            )
+    except IntegrityError:  # created concurrently
+        rows.update(**updates)
+
+
+def record_post_removal(post):
+    """Take a post and everything that cascades with it out of the rollups."""
+    removed = Counter({(timezone.localdate(post.created_at), "posts"): 1})
+    for model, metric in ((Comment, "comments"), (PostLike, "likes")):
+        for day, n in (
+            model.objects.filter(post=post).annotate(day=TruncDate("created_at"))
+            .values("day").annotate(n=Count("id")).values_list("day", "n")
+        ):
+            removed[day, metric] += n
+    # Likes still sitting in shards never reached the rollups.
+    for day, n in LikeShard.objects.filter(post=post).values("day").annotate(n=Sum("count")).values_list("day", "n"):
+        removed[day, "likes"] -= n
+    by_day = {}
+    for (day, metric), n in removed.items():
+        if n:
+            by_day.setdefault(day, {})[metric] = -n
+    for day, deltas in by_day.items():
+        record_activity(day, post.category_id, **deltas)
+
+
+def activity_summary(start, end):
+    """Totals per day and per category for start <= day <= end, from the rollups only."""
+    rows = DailyActivity.objects.filter(day__gte=start, day__lte=end)
+    sums = {m: Sum(m) for m in METRICS}
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "days": [
+            {"day": r["day"].isoformat(), **{m: r[m] for m in METRICS}}
+            for r in rows.values("day").annotate(**sums).order_by("day")
+        ],
+        "categories": list(
+            rows.values(slug=F("category__slug"), name=F("category__name")).annotate(**sums).order_by("name")
+        ),
+    }
+
+
+def _aggregate(qs, metric, totals, category_field, stdout=None):
+    bounds = qs.aggregate(lo=Min("pk"), hi=Max("pk"))
+    if bounds["lo"] is None:
+        return
+    for lo in range(bounds["lo"], bounds["hi"] + 1, REBUILD_CHUNK):
+        for day, category_id, n in (
+            qs.filter(pk__gte=lo, pk__lt=lo + REBUILD_CHUNK)
+            .annotate(day=TruncDate("created_at"))
+            .values("day", category_field).annotate(n=Count("id"))
+            .values_list("day", category_field, "n")
+        ):
+            totals[day, category_id][metric] += n
+        if stdout:
+            stdout.write(f"  {metric}: up to id {min(lo + REBUILD_CHUNK - 1, bounds['hi'])}\n")
+
+
+def rebuild_daily_activity(stdout=None):
+    totals = defaultdict(Counter)
+    _aggregate(Post.objects.order_by(), "posts", totals, "category_id", stdout)
+    _aggregate(Comment.objects.order_by(), "comments", totals, "post__category_id", stdout)
+    _aggregate(PostLike.objects.order_by(), "likes", totals, "post__category_id", stdout)
+
+    with transaction.atomic():
+        # Pending shard likes are in PostLike but reach the rollups when folded; locking the
+        # shards keeps a fold from running between this read and the commit.
+        for day, category_id, n in LikeShard.objects.select_for_update(of=("self",)).values_list(
+            "day", "post__category_id", "count"
+        ):
+            totals[day, category_id]["likes"] -= n
+        DailyActivity.objects.all().delete()
+        DailyActivity.objects.bulk_create(
+            [
+                DailyActivity(day=day, category_id=category_id, **{m: max(c[m], 0) for m in METRICS})
+                for (day, category_id), c in totals.items()
+            ],
+            batch_size=1000,
+        )
+    return len(totals)
@@ -1,15 +1,32 @@
 # forum/tests.py
 from __future__ import annotations
+import asyncio
 import os
+from datetime import timedelta
+import re
+import threading
 from uuid import uuid4
+from io import StringIO
 from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import AsyncClient, TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
-from .models import Category, Post, Comment
+from .models import Category, Post, Comment, DailyActivity, LikeShard, PostLike, hot_score
 from . import views
+from .cards import card_cache_key
+from . import live
+from .live import hub as comment_hub
+from . import categories
+from .categories import all_categories, get_category, seed_categories
+from .search import search_posts
 
 
 class ForumTests(TestCase):
@@ -40,11 +57,39 @@ class ForumTests(TestCase):
             title="Post 2", slug="post-2", category=self.cat_player, body="second body", status=Post.PUBLISHED
         )
 
-    def test_ensure_default_categories_creates_when_empty(self):
+    def test_seed_categories_loads_fixture_when_empty(self):
         Post.objects.all().delete()
         Category.objects.all().delete()
-        views.ensure_default_categories()
-        self.assertGreaterEqual(Category.objects.count(), 5)
+        seed_categories()
+        self.assertEqual(
+            {c.slug for c in all_categories()}, {"news", "player", "merch", "ticket", "match"}
+        )
+
+    def test_category_registry_is_cached_and_invalidated(self):
+        all_categories()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_category("news"), self.cat_news)
+        Category.objects.create(name="Ticket", slug="ticket")
+        self.assertIsNotNone(get_category("ticket"))
+        Category.objects.get(slug="ticket").delete()
+        self.assertIsNone(get_category("ticket"))
+
+    def test_category_registry_sees_changes_from_other_processes(self):
+        all_categories()
+        # A category created on another worker: no signal reaches this process.
+        Category.objects.bulk_create([Category(name="Match", slug="match")])
+        self.assertEqual(get_category("match").name, "Match")
+        self.assertIn("match", {c.slug for c in all_categories()})
+        Category.objects.filter(slug="match").update(name="Matchday")
+        cache.incr(categories.GENERATION_KEY)  # that worker's invalidate_categories()
+        self.assertEqual(get_category("match").name, "Matchday")
+
+    def test_post_list_does_not_query_categories(self):
+        self.client.login(username="user", password="p")
+        self.client.get(reverse("forum:post_list"))
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse("forum:post_list"), {"category": "news"})
+        self.assertFalse(any('FROM "forum_category"' in q["sql"] for q in ctx.captured_queries))
 
     @patch("forum.views.render_to_string", return_value="<div>card</div>")
     def test_post_list_partial_paginates_and_filters(self, _mock_tpl):
@@ -74,6 +119,67 @@ class ForumTests(TestCase):
         self.assertEqual(resp3.status_code, 200)
         self.assertIn("html", resp3.json())
 
+    def test_post_list_partial_cursor_walks_ties_once(self):
+        for i in range(11):
+            Post.objects.create(title=f"Tie {i}", slug=f"tie-{i}", category=self.cat_news, body="b")
+        Post.objects.update(created_at=self.p1.created_at)
+        self.client.login(username="user", password="p")
+        url = reverse("forum:post_list_partial")
+
+        seen, cursor = [], ""
+        with patch("forum.views.render_cards", return_value="") as tpl:
+            while True:
+                data = self.client.get(url, {"cursor": cursor} if cursor else {}).json()
+                seen += [p.slug for p in tpl.call_args.args[0]]
+                if not data["has_next"]:
+                    break
+                cursor = data["next_cursor"]
+        self.assertEqual(tpl.call_count, 3)
+        self.assertEqual(len(seen), 13)
+        self.assertEqual(set(seen), set(Post.objects.values_list("slug", flat=True)))
+
+    def test_post_list_partial_skips_count_query(self):
+        self.client.login(username="user", password="p")
+        self.client.get(reverse("forum:post_list_partial"))
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse("forum:post_list_partial"))
+        self.assertFalse(any("COUNT(" in q["sql"] for q in ctx.captured_queries))
+
+    def test_decode_cursor_rejects_garbage(self):
+        self.assertIsNone(views._decode_cursor("not-a-cursor"))
+        token = views._encode_cursor(self.p1.created_at.isoformat(), self.p1.pk)
+        self.assertEqual(views._decode_cursor(token), (self.p1.created_at, self.p1.pk))
+        self.assertEqual(views._decode_cursor(views._encode_cursor(12)), (12,))
+
+    def test_search_ranks_title_matches_first(self):
+        body_hit = Post.objects.create(title="Kabar", slug="kabar", category=self.cat_news, body="timnas garuda menang")
+        title_hit = Post.objects.create(title="Timnas Garuda", slug="timnas", category=self.cat_news, body="laga")
+        found = list(search_posts(Post.objects.all(), "garuda timn"))
+        self.assertEqual(found, [title_hit, body_hit])
+        self.assertFalse(search_posts(Post.objects.all(), "?!").exists())
+
+    def test_search_index_follows_save_and_delete(self):
+        self.assertEqual(list(search_posts(Post.objects.all(), "hello")), [self.p1])
+        self.p1.body = "goodbye"
+        self.p1.excerpt = "goodbye"
+        self.p1.save()
+        self.assertFalse(search_posts(Post.objects.all(), "hello").exists())
+        self.assertEqual(list(search_posts(Post.objects.all(), "goodbye")), [self.p1])
+        self.p1.delete()
+        self.assertFalse(search_posts(Post.objects.all(), "goodbye").exists())
+
+    def test_post_list_partial_search_pages_by_offset(self):
+        for i in range(7):
+            Post.objects.create(title=f"Match {i}", slug=f"match-{i}", category=self.cat_news, body="skor")
+        self.client.login(username="user", password="p")
+        url = reverse("forum:post_list_partial")
+        with patch("forum.views.render_cards", return_value="") as tpl:
+            first = self.client.get(url, {"q": "skor"}).json()
+            self.assertTrue(first["has_next"])
+            second = self.client.get(url, {"q": "skor", "cursor": first["next_cursor"]}).json()
+        self.assertFalse(second["has_next"])
+        self.assertEqual(len(tpl.call_args.args[0]), 1)
+
     @patch("forum.views.render_to_string", return_value="<div>card</div>")
     def test_post_create_ok_and_invalid(self, _mock_tpl):
         self.client.login(username="user", password="p")
@@ -98,6 +204,9 @@ class ForumTests(TestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertTrue(resp.json()["ok"])
         self.assertEqual(self.p1.comments.count(), 1)
+        self.assertEqual(resp.json()["comment_count"], 1)
+        self.p1.refresh_from_db()
+        self.assertEqual(self.p1.comment_count, 1)
 
     def test_post_like_toggle(self):
         self.client.login(username="user", password="p")
@@ -117,8 +226,260 @@ class ForumTests(TestCase):
         self.p1.refresh_from_db()
         self.assertEqual(self.p1.like_count, 0)
 
+    def test_post_like_rolls_back_when_the_counter_update_fails(self):
+        self.client.login(username="user", password="p")
+        url = reverse("forum:post_like", kwargs={"slug": self.p1.slug})
+        with patch("forum.views.add_like", side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            self.client.post(url)
+        self.assertFalse(PostLike.objects.exists())
+        self.assertTrue(self.client.post(url).json()["liked"])
+        self.p1.refresh_from_db()
+        self.assertEqual(self.p1.like_count, 1)
+
+    def test_unlike_dates_the_rollup_from_the_deleted_row(self):
+        like = PostLike.objects.create(user=self.user, post=self.p1)
+        day = timezone.localdate() - timedelta(days=3)
+        PostLike.objects.filter(pk=like.pk).update(created_at=like.created_at - timedelta(days=3))
+        Post.objects.filter(pk=self.p1.pk).update(like_count=1)
+        DailyActivity.objects.create(day=day, category=self.cat_news, likes=1)
+        self.client.login(username="user", password="p")
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(reverse("forum:post_like", kwargs={"slug": self.p1.slug}))
+        self.assertFalse(resp.json()["liked"])
+        self.assertEqual([q for q in ctx.captured_queries if 'FROM "forum_postlike"' in q["sql"]
+                          and q["sql"].startswith("SELECT")], [])
+        self.assertEqual(DailyActivity.objects.get(day=day).likes, 0)
+        self.assertFalse(PostLike.objects.exists())
+
+    def test_post_like_persists_across_sessions(self):
+        self.client.login(username="user", password="p")
+        self.client.post(reverse("forum:post_like", kwargs={"slug": self.p1.slug}))
+        self.client.logout()
+
+        self.client.login(username="user", password="p")
+        resp = self.client.get(reverse("forum:post_list"))
+        self.assertEqual(resp.context["liked_ids"], {self.p1.id})
+        self.assertTrue(PostLike.objects.filter(user=self.user, post=self.p1).exists())
+
+    def test_liked_ids_single_query(self):
+        PostLike.objects.create(user=self.user, post=self.p2)
+        with self.assertNumQueries(1):
+            liked = views._liked_ids(self.user, [self.p1, self.p2])
+        self.assertEqual(liked, {self.p2.id})
+
+    def test_adjust_counter_never_negative(self):
+        self.assertEqual(Post.adjust_counter(self.p1.pk, "like_count", -1), 0)
+        self.assertEqual(Post.adjust_counter(self.p1.pk, "like_count", 2), 2)
+        self.assertIsNone(Post.adjust_counter(-1, "like_count", 1))
+
+    def test_adjust_counter_rescores_in_the_same_statement(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(Post.adjust_counter(self.p1.pk, "comment_count", 3), 3)
+        Post.adjust_counter(self.p1.pk, "like_count", 4)
+        self.p1.refresh_from_db()
+        self.assertAlmostEqual(self.p1.hot_score, hot_score(4, 3, self.p1.created_at), places=6)
+
+    def test_hot_score_migration_backfills_through_the_runner(self):
+        from importlib import import_module
+        from django.apps import apps
+        from backfill.models import BackfillProgress
+
+        Post.objects.update(hot_score=0)
+        BackfillProgress.objects.filter(name="forum.0010_backfill_hot_score").delete()  # completed at migrate
+        import_module("forum.migrations.0010_backfill_hot_score").backfill_hot_score(apps, None)
+        for post in Post.objects.all():
+            self.assertEqual(post.hot_score, hot_score(post.like_count, post.comment_count, post.created_at))
+        self.assertIsNotNone(BackfillProgress.objects.get(name="forum.0010_backfill_hot_score").completed_at)
+
+    def test_repair_comment_counts(self):
+        Comment.objects.bulk_create([Comment(post=self.p1, body="a"), Comment(post=self.p1, body="b")])
+        Post.objects.filter(pk=self.p2.pk).update(comment_count=7)
+        out = StringIO()
+        call_command("repair_comment_counts", stdout=out)
+        self.assertIn("on 2 posts", out.getvalue())
+        self.assertEqual(
+            dict(Post.objects.values_list("slug", "comment_count")), {"post-1": 2, "post-2": 0}
+        )
+        for post in Post.objects.all():
+            self.assertEqual(post.hot_score, hot_score(post.like_count, post.comment_count, post.created_at))
+
+    def test_post_detail_paginates_comments(self):
+        Comment.objects.bulk_create([Comment(post=self.p1, body=f"c{i}") for i in range(25)])
+        Comment.objects.filter(post=self.p1).update(created_at=self.p1.created_at)
+        self.client.login(username="user", password="p")
+
+        resp = self.client.get(reverse("forum:post_detail", kwargs={"slug": self.p1.slug}))
+        first = resp.context["comments"]
+        self.assertEqual(len(first), views.COMMENTS_PER_PAGE)
+        self.assertTrue(resp.context["next_cursor"])
+
+        url = reverse("forum:comment_list_partial", kwargs={"slug": self.p1.slug})
+        data = self.client.get(url, {"cursor": resp.context["next_cursor"]}).json()
+        self.assertFalse(data["has_next"])
+        rest = [int(i) for i in re.findall(r'data-comment-id="(\d+)"', data["html"])]
+        self.assertEqual(len(rest), 5)
+        self.assertEqual(
+            [c.pk for c in first] + rest,
+            list(Comment.objects.filter(post=self.p1).order_by("id").values_list("id", flat=True)),
+        )
+
+    def test_hot_sort_follows_likes_and_comments(self):
+        self.client.login(username="user", password="p")
+        url = reverse("forum:post_list_partial")
+        with patch("forum.views.render_cards", return_value="") as tpl:
+            self.client.get(url, {"sort": "hot"})
+            self.assertEqual(tpl.call_args.args[0][0], self.p2)
+
+            self.client.post(reverse("forum:post_like", kwargs={"slug": self.p1.slug}))
+            self.client.get(url, {"sort": "hot"})
+            self.assertEqual(tpl.call_args.args[0][0], self.p1)
+
+            self.client.post(reverse("forum:comment_create", kwargs={"slug": self.p2.slug}), {"author_name": "A", "body": "a"})
+            self.client.post(reverse("forum:comment_create", kwargs={"slug": self.p2.slug}), {"author_name": "B", "body": "b"})
+            self.client.get(url, {"sort": "hot"})
+            self.assertEqual(tpl.call_args.args[0][0], self.p2)
+
+    def test_hot_sort_cursor_walks_every_post(self):
+        for i in range(8):
+            Post.objects.create(title=f"Hot {i}", slug=f"hot-{i}", category=self.cat_news, body="b", like_count=i % 3)
+        self.client.login(username="user", password="p")
+        url = reverse("forum:post_list_partial")
+        seen, cursor = [], ""
+        with patch("forum.views.render_cards", return_value="") as tpl:
+            while True:
+                data = self.client.get(url, {"sort": "hot", "cursor": cursor}).json()
+                seen += tpl.call_args.args[0]
+                if not data["has_next"]:
+                    break
+                cursor = data["next_cursor"]
+        self.assertEqual(seen, list(Post.objects.order_by("-hot_score", "-id")))
+
+    def test_rescore_hot_posts_repairs_drift(self):
+        Post.objects.filter(pk=self.p1.pk).update(like_count=50, hot_score=0)
+        call_command("rescore_hot_posts", stdout=StringIO())
+        self.p1.refresh_from_db()
+        self.assertEqual(self.p1.hot_score, hot_score(50, 0, self.p1.created_at))
+
+    async def test_comment_stream_pushes_new_comments(self):
+        old = await Comment.objects.acreate(post=self.p1, author_name="Old", body="lama")
+        new = await Comment.objects.acreate(post=self.p1, author_name="New", body="baru")
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        url = reverse("forum:comment_stream", kwargs={"slug": self.p1.slug})
+        with patch("forum.live.STREAM_MAX_SECONDS", 0.2), patch("forum.live.POLL_SECONDS", 0.05):
+            resp = await client.get(url, {"since": old.id})
+            self.assertEqual(resp["Content-Type"], "text/event-stream")
+            body = "".join([chunk.decode() async for chunk in resp.streaming_content])
+        self.assertIn(f"id: {new.id}\nevent: comment", body)
+        self.assertIn("baru", body)
+        self.assertNotIn("lama", body)
+
+    def test_comment_stream_declines_under_wsgi(self):
+        self.client.login(username="user", password="p")
+        resp = self.client.get(reverse("forum:comment_stream", kwargs={"slug": self.p1.slug}))
+        self.assertEqual(resp.status_code, 204)
+
+    def test_comment_stream_poll_releases_connection_outside_transactions(self):
+        with patch("forum.live.connection") as conn:
+            conn.in_atomic_block = False
+            live._poll(None, self.p1.pk, 0)
+        conn.close.assert_called_once_with()
+
+    @patch("forum.views.render_to_string", return_value="")
+    def test_comment_create_publishes_after_commit(self, _mock_tpl):
+        self.client.login(username="user", password="p")
+        url = reverse("forum:comment_create", kwargs={"slug": self.p1.slug})
+        with patch.object(comment_hub, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(url, {"author_name": "A", "body": "x"})
+        publish.assert_called_once_with(self.p1.pk)
+
+    async def test_comment_hub_wakes_subscribers_from_other_threads(self):
+        waiter = comment_hub.subscribe(self.p1.pk)
+        threading.Thread(target=comment_hub.publish, args=(self.p1.pk,)).start()
+        await asyncio.wait_for(waiter[1].wait(), 1)
+        comment_hub.unsubscribe(self.p1.pk, waiter)
+        self.assertNotIn(self.p1.pk, comment_hub._waiters)
+
+    @patch("forum.views.render_to_string", return_value="")
+    def test_activity_rollups_match_rebuild(self, _mock_tpl):
+        self.client.login(username="user", password="p")
+        self.client.post(reverse("forum:post_create"), {"title": "T", "category": self.cat_player.id, "body": "B", "author_name": "A"})
+        for body in ("a", "b"):
+            self.client.post(reverse("forum:comment_create", kwargs={"slug": self.p1.slug}), {"author_name": "A", "body": body})
+        self.client.post(reverse("forum:post_like", kwargs={"slug": self.p1.slug}))
+        self.client.post(reverse("forum:post_like", kwargs={"slug": self.p2.slug}))
+        self.client.post(reverse("forum:post_like", kwargs={"slug": self.p2.slug}))
+        self.client.logout()
+        self.client.login(username=self.admin.username, password=self.admin_password)
+        self.client.post(reverse("forum:delete_comment", kwargs={"comment_id": self.p1.comments.first().id}))
+        self.client.post(reverse("forum:delete_post", kwargs={"slug": self.p2.slug}))
+
+        rows = lambda: sorted(DailyActivity.objects.values_list("day", "category__slug", "posts", "comments", "likes"))
+        incremental = rows()
+        today = timezone.localdate()
+        self.assertIn((today, "news", 0, 1, 1), incremental)
+        call_command("rebuild_forum_stats", stdout=StringIO())
+        # setUp's posts were created without going through the views.
+        self.assertEqual(rows(), [(today, "news", 1, 1, 1), (today, "player", 1, 0, 0)])
+        self.assertEqual(incremental, [(today, "news", 0, 1, 1), (today, "player", 0, 0, 0)])
+
+    def test_activity_stats_admin_only(self):
+        DailyActivity.objects.create(day=timezone.localdate(), category=self.cat_news, posts=3, comments=5, likes=7)
+        url = reverse("forum:activity_stats")
+        self.client.login(username="user", password="p")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.logout()
+        self.client.login(username=self.admin.username, password=self.admin_password)
+        data = self.client.get(url, {"days": 365}).json()
+        self.assertEqual(data["days"], [{"day": timezone.localdate().isoformat(), "posts": 3, "comments": 5, "likes": 7}])
+        self.assertEqual(data["categories"], [{"slug": "news", "name": "News", "posts": 3, "comments": 5, "likes": 7}])
+
+    def test_cards_are_cached_per_version_without_user_state(self):
+        cache.clear()
+        PostLike.objects.create(user=self.user, post=self.p1)
+        self.client.login(username="user", password="p")
+        url = reverse("forum:post_list_partial")
+        data = self.client.get(url).json()
+        self.assertEqual(data["liked_ids"], [self.p1.id])
+        self.assertNotIn("liked", data["html"].replace("btn-like", ""))
+
+        with patch("forum.cards.get_template") as get_template:
+            self.assertEqual(self.client.get(url).json()["html"], data["html"])
+        get_template.assert_not_called()
+
+        Post.adjust_counter(self.p1.pk, "like_count", 5)
+        html = self.client.get(url).json()["html"]
+        self.assertIn('<span class="like-count text-sm text-gray-500">5</span>', html)
+        self.assertIn(card_cache_key(Post.objects.select_related("category").get(pk=self.p1.pk)), cache)
+
+    @override_settings(FORUM_LIKE_SHARDS=4)
+    def test_sharded_likes_fold_into_post(self):
+        User = get_user_model()
+        url = reverse("forum:post_like", kwargs={"slug": self.p1.slug})
+        for i in range(3):
+            User.objects.create_user(username=f"fan{i}", password="p", role="USER")
+            self.client.login(username=f"fan{i}", password="p")
+            self.assertEqual(self.client.post(url).json()["like_count"], i + 1)
+        self.assertEqual(self.client.post(url).json(), {"ok": True, "liked": False, "like_count": 2})
+
+        self.p1.refresh_from_db()
+        self.assertEqual(self.p1.like_count, 0)
+        self.assertEqual(LikeShard.objects.filter(post=self.p1).aggregate(n=Sum("count"))["n"], 2)
+
+        # a rebuild before the fold must not count the pending likes twice
+        call_command("rebuild_forum_stats", stdout=StringIO())
+        self.assertEqual(DailyActivity.objects.get(category=self.cat_news).likes, 0)
+        call_command("fold_like_shards", stdout=StringIO())
+        self.p1.refresh_from_db()
+        self.assertEqual(self.p1.like_count, 2)
+        self.assertAlmostEqual(self.p1.hot_score, hot_score(2, 0, self.p1.created_at), places=6)
+        self.assertFalse(LikeShard.objects.exists())
+        self.assertEqual(DailyActivity.objects.get(category=self.cat_news).likes, 2)
+
     def test_delete_comment_permissions_and_method(self):
         c = Comment.objects.create(post=self.p1, author_name="A", body="x")
+        Post.objects.filter(pk=self.p1.pk).update(comment_count=1)
 
         self.client.login(username="user", password="p")
         url = reverse("forum:delete_comment", kwargs={"comment_id": c.id})
@@ -134,6 +495,19 @@ class ForumTests(TestCase):
         resp_ok = self.client.post(url)
         self.assertEqual(resp_ok.status_code, 302)
         self.assertFalse(Comment.objects.filter(id=c.id).exists())
+        self.p1.refresh_from_db()
+        self.assertEqual(self.p1.comment_count, 0)
+
+    def test_delete_comment_lost_race_leaves_counters_alone(self):
+        c = Comment.objects.create(post=self.p1, author_name="A", body="x")
+        Post.objects.filter(pk=self.p1.pk).update(comment_count=1)
+        DailyActivity.objects.create(day=timezone.localdate(c.created_at), category=self.p1.category, comments=1)
+        self.client.login(username=self.admin.username, password=self.admin_password)
+        with patch.object(Comment, "delete", return_value=(0, {})):  # another request deleted it first
+            self.client.post(reverse("forum:delete_comment", kwargs={"comment_id": c.id}))
+        self.p1.refresh_from_db()
+        self.assertEqual(self.p1.comment_count, 1)
+        self.assertEqual(DailyActivity.objects.get().comments, 1)
 
     def test_delete_post_permissions_and_method(self):
         slug = self.p2.slug
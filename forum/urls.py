@@ -9,9 +9,12 @@ urlpatterns = [
     path("partial/", views.post_list_partial, name="post_list_partial"),
     path("create/", views.post_create, name="post_create"),
     path("forum/<slug:slug>/", views.post_detail, name="post_detail"),
+    path("forum/<slug:slug>/comments/", views.comment_list_partial, name="comment_list_partial"),
+    path("forum/<slug:slug>/comments/stream/", views.comment_stream, name="comment_stream"),
     path("<slug:slug>/comment/", views.comment_create, name="comment_create"),
     path("<slug:slug>/like/", views.post_like, name="post_like"),
     path("comment/<int:comment_id>/delete/", views.delete_comment, name="delete_comment"),
     path("post/<slug:slug>/delete/", views.delete_post, name="delete_post"),
+    path("stats/", views.activity_stats, name="activity_stats"),
 
 ]
@@ -1,26 +1,53 @@
-from django.core.paginator import Paginator, EmptyPage
-from django.http import JsonResponse, Http404, HttpResponseForbidden
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, Http404, HttpResponseForbidden, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.template.loader import render_to_string
 from django.utils import timezone
-from django.db.models import Q, F
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.views.decorators.http import require_POST
-from .models import Post, Category
 from .forms import PostFilterForm, PostForm, CommentForm
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from .models import Comment 
-from .models import Post
-
-def ensure_default_categories():
-    if not Category.objects.exists():
-        Category.objects.bulk_create([
-            Category(name="News",  slug="news"),
-            Category(name="Player", slug="player"),
-            Category(name="Merch", slug="merch"),
-            Category(name="Ticket", slug="ticket"),
-            Category(name="Match", slug="match"),
-        ])
+from .models import Post, PostLike
+from .cards import render_cards
+from .categories import all_categories, get_category
+from .likes import add_like, like_total
+from .live import comment_events, hub as comment_hub
+from .search import search_posts
+from .stats import activity_summary, record_activity, record_post_removal
+
+POSTS_PER_PAGE = 6
+COMMENTS_PER_PAGE = 20
+MAX_STATS_DAYS = 731
+
+def _liked_ids(user, posts):
+    return set(
+        PostLike.objects.filter(user=user, post__in=[p.pk for p in posts]).values_list("post_id", flat=True)
+    )
+
+def _encode_cursor(*parts):
+    raw = "|".join(str(p) for p in parts)
+    return urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode_cursor(token, key=datetime.fromisoformat):
+    """(key value, id) for a keyset cursor, (offset,) for a search cursor, else None."""
+    try:
+        parts = urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode().split("|")
+        if len(parts) == 2:
+            return key(parts[0]), int(parts[1])
+        if len(parts) == 1:
+            return (max(int(parts[0]), 0),)
+    except ValueError:
+        pass
+    return None
+
+def _cursor_value(value):
+    return value.isoformat() if isinstance(value, datetime) else repr(value)
 
 @login_required
 def _get_posts_context(request):
@@ -32,71 +59,72 @@ def _get_posts_context(request):
     cat_slug = params.get("category") or request.GET.get("category") or "all"
     active_category = "all"
     if cat_slug and cat_slug != "all":
-        qs = qs.filter(category__slug=cat_slug)
+        category = get_category(cat_slug)
+        qs = qs.filter(category=category) if category else qs.none()
         active_category = cat_slug
 
+    # Keyset pagination on (created_at, id) or (hot_score, id); ?page=N is still honoured
+    # for plain links. Relevance order has no stable key to seek on, so search pages by offset.
+    offset = 0
+    try:
+        offset = (max(int(request.GET.get("page", 1)), 1) - 1) * POSTS_PER_PAGE
+    except ValueError:
+        pass
+    sort = params.get("sort") or "new"
+    key = "hot_score" if sort == "hot" else "created_at"
+    cursor = _decode_cursor(request.GET.get("cursor") or "", float if sort == "hot" else datetime.fromisoformat)
+
     q = params.get("q") or request.GET.get("q")
     if q:
-        qs = qs.filter(
-            Q(title__icontains=q) |
-            Q(body__icontains=q) |
-            Q(excerpt__icontains=q)
-        )
-
-    paginator = Paginator(qs, 6)
-    page = request.GET.get("page", 1)
+        qs = search_posts(qs, q)
+        if cursor and len(cursor) == 1:
+            offset = cursor[0]
+    else:
+        qs = qs.order_by(f"-{key}", "-id")
+        if cursor and len(cursor) == 2:
+            value, pk = cursor
+            qs = qs.filter(Q(**{f"{key}__lt": value}) | Q(**{key: value, "pk__lt": pk}))
+            offset = 0
 
-    page_obj = paginator.get_page(page) 
+    rows = list(qs[offset:offset + POSTS_PER_PAGE + 1])
+    posts, has_next = rows[:POSTS_PER_PAGE], len(rows) > POSTS_PER_PAGE
+    next_cursor = ""
+    if has_next:
+        next_cursor = (
+            _encode_cursor(offset + POSTS_PER_PAGE) if q
+            else _encode_cursor(_cursor_value(getattr(posts[-1], key)), posts[-1].pk)
+        )
     return {
-        "posts": page_obj.object_list,
-        "page_obj": page_obj,
+        "posts": posts,
+        "has_next": has_next,
+        "next_cursor": next_cursor,
         "active_category": active_category or "all",
-        "liked_ids": set(request.session.get("liked_posts", [])), 
+        "sort": sort,
+        "liked_ids": _liked_ids(request.user, posts),
     }
 
 @login_required
 def post_list(request):
-    ensure_default_categories()
-    categories = Category.objects.all()
     base_ctx = {
-        "categories": categories,
+        "categories": all_categories(),
         "active_category": request.GET.get("category", "all"),
         "year": timezone.now().year,
         "post_form": PostForm(),
         "form": PostFilterForm(request.GET or None),
     }
-    
-    try:
-        base_ctx.update(_get_posts_context(request))
-    except EmptyPage:
-        base_ctx.update({
-            "posts": [],
-            "page_obj": None,
-        })
-        
+    base_ctx.update(_get_posts_context(request))
+    base_ctx["cards_html"] = render_cards(base_ctx["posts"])
+    base_ctx["liked_ids_list"] = sorted(base_ctx["liked_ids"])
     return render(request, "forum/post_list.html", base_ctx)
 
 @login_required
 def post_list_partial(request):
-    try:
-        ctx = _get_posts_context(request)
-    except EmptyPage:
-        return JsonResponse({"html": "", "has_next": False})
-
-    html_list = []
-    for post in ctx.get("posts", []):
-        html_list.append(
-            render_to_string(
-                "forum/_post_card.html",
-                {"p": post, "liked_ids": ctx.get("liked_ids", set())},
-                request=request
-            )
-        )
-    html = "".join(html_list)
-    
+    ctx = _get_posts_context(request)
     return JsonResponse({
-        "html": html, 
-        "has_next": ctx["page_obj"].has_next()
+        "html": render_cards(ctx["posts"]),
+        "liked_ids": sorted(ctx["liked_ids"]),
+        "has_next": ctx["has_next"],
+        "next_cursor": ctx["next_cursor"],
     })
 
 @login_required
@@ -105,7 +133,8 @@ def post_create(request):
     form = PostForm(request.POST)
     if form.is_valid():
         post = form.save()
-        card_html = render_to_string("forum/_post_card.html", {"p": post}, request=request)
+        record_activity(timezone.localdate(post.created_at), post.category_id, posts=1)
+        card_html = render_cards([post])
         return JsonResponse({"ok": True, "html": card_html})
     return JsonResponse({"ok": False, "errors": form.errors}, status=400)
 
@@ -113,16 +142,59 @@ def post_create(request):
 @login_required
 def post_detail(request, slug):
     post = get_object_or_404(Post.objects.select_related("category"), slug=slug, status=Post.PUBLISHED)
-    comments = post.comments.all()
+    comments, next_cursor = _comments_page(post, None)
+    if next_cursor:
+        latest_comment_id = Comment.objects.filter(post=post).order_by("-id").values_list("id", flat=True).first()
+    else:
+        latest_comment_id = comments[-1].id if comments else 0
     return render(request, "forum/post_detail.html", {
         "post": post,
         "comments": comments,
+        "next_cursor": next_cursor,
+        "latest_comment_id": latest_comment_id,
         "comment_form": CommentForm(),
         "year": timezone.now().year,
-        "categories": Category.objects.all(),
+        "categories": all_categories(),
         "active_category": post.category.slug
     })
 
+def _comments_page(post, cursor):
+    """One page of comments, oldest first, seeking past the (created_at, id) cursor."""
+    qs = Comment.objects.filter(post=post).order_by("created_at", "id")
+    if cursor and len(cursor) == 2:
+        created_at, pk = cursor
+        qs = qs.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+    rows = list(qs[:COMMENTS_PER_PAGE + 1])
+    comments = rows[:COMMENTS_PER_PAGE]
+    if len(rows) > COMMENTS_PER_PAGE:
+        return comments, _encode_cursor(comments[-1].created_at.isoformat(), comments[-1].pk)
+    return comments, ""
+
+@login_required
+def comment_list_partial(request, slug):
+    post = get_object_or_404(Post.objects.only("id"), slug=slug, status=Post.PUBLISHED)
+    comments, next_cursor = _comments_page(post, _decode_cursor(request.GET.get("cursor") or ""))
+    html = render_to_string("forum/_comments.html", {"comments": comments}, request=request)
+    return JsonResponse({"html": html, "has_next": bool(next_cursor), "next_cursor": next_cursor})
+
+@login_required
+async def comment_stream(request, slug):
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)  # see forum.live: streams need ASGI
+    post_id = await Post.objects.filter(slug=slug, status=Post.PUBLISHED).values_list("id", flat=True).afirst()
+    if post_id is None:
+        raise Http404("Post not found")
+    request.user = await request.auser()  # _comment.html checks request.user
+    since = request.headers.get("Last-Event-ID") or request.GET.get("since")
+    try:
+        last_id = int(since)
+    except (TypeError, ValueError):
+        last_id = await Comment.objects.filter(post_id=post_id).order_by("-id").values_list("id", flat=True).afirst() or 0
+    response = StreamingHttpResponse(comment_events(request, post_id, last_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
 @login_required
 @require_POST
 def comment_create(request, slug):
@@ -131,43 +203,47 @@ def comment_create(request, slug):
     if form.is_valid():
         comment = form.save(commit=False)
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            comment_count = Post.adjust_counter(post.pk, "comment_count", 1)
+            record_activity(timezone.localdate(comment.created_at), post.category_id, comments=1)
+            transaction.on_commit(lambda: comment_hub.publish(post.pk))
         html = render_to_string("forum/_comment.html", {"c": comment}, request=request)
-        return JsonResponse({"ok": True, "html": html})
+        return JsonResponse({"ok": True, "html": html, "comment_count": comment_count})
     return JsonResponse({"ok": False, "errors": form.errors}, status=400)
 
 @login_required
 @require_POST
 def post_like(request, slug):
-    post = get_object_or_404(Post, slug=slug, status=Post.PUBLISHED)
-    liked_posts = request.session.get("liked_posts", [])
-    if not isinstance(liked_posts, list):
-        liked_posts = []
-
-    if post.id in liked_posts:
-        Post.objects.filter(pk=post.pk, like_count__gt=0).update(like_count=F("like_count") - 1)
-        liked_posts.remove(post.id)
-        liked = False
-    else:
-        Post.objects.filter(pk=post.pk).update(like_count=F("like_count") + 1)
-        liked_posts.append(post.id)
-        liked = True
+    post = get_object_or_404(Post.objects.only("id", "category_id"), slug=slug, status=Post.PUBLISHED)
+    # The like row and the counters change together, or not at all.
+    with transaction.atomic():
+        unliked_at = PostLike.remove(request.user.pk, post.pk)
+        if unliked_at:
+            liked, delta, day = False, -1, timezone.localdate(unliked_at)
+        else:
+            try:
+                with transaction.atomic():
+                    like = PostLike.objects.create(user=request.user, post=post)
+                liked, delta, day = True, 1, timezone.localdate(like.created_at)
+            except IntegrityError:  # a concurrent request already liked it
+                liked, delta = True, 0
 
-    request.session["liked_posts"] = liked_posts
-    request.session.modified = True
-    post.refresh_from_db(fields=["like_count"])
-    
-    return JsonResponse({"ok": True, "liked": liked, "like_count": post.like_count})
+        like_count = add_like(post, day, delta) if delta else like_total(post.pk)
+    return JsonResponse({"ok": True, "liked": liked, "like_count": like_count})
 
 @login_required
 def delete_comment(request, comment_id):
     if request.method != "POST":
         return HttpResponseForbidden("Invalid request method.")
-    comment = get_object_or_404(Comment, id=comment_id)
+    comment = get_object_or_404(Comment.objects.select_related("post"), id=comment_id)
     if not request.user.is_superuser:
         return HttpResponseForbidden("Anda tidak punya izin untuk menghapus komentar ini.")
     post_slug = comment.post.slug
-    comment.delete()
+    with transaction.atomic():
+        if comment.delete()[0]:  # 0 = a concurrent delete got there first
+            Post.adjust_counter(comment.post_id, "comment_count", -1)
+            record_activity(timezone.localdate(comment.created_at), comment.post.category_id, comments=-1)
     return redirect("forum:post_detail", slug=post_slug)
 
 @login_required
@@ -177,5 +253,18 @@ def delete_post(request, slug):
     post = get_object_or_404(Post, slug=slug)
     if not request.user.is_superuser:
         return HttpResponseForbidden("Anda tidak punya izin untuk menghapus post ini.")
-    post.delete()
-    return redirect("forum:post_list")
\ No newline at end of file
+    with transaction.atomic():
+        record_post_removal(post)
+        post.delete()
+    return redirect("forum:post_list")
+
+@login_required
+def activity_stats(request):
+    if not request.user.is_superuser:
+        return HttpResponseForbidden("Anda tidak punya izin untuk melihat statistik forum.")
+    try:
+        days = min(max(int(request.GET.get("days", 30)), 1), MAX_STATS_DAYS)
+    except ValueError:
+        days = 30
+    end = timezone.localdate()
+    return JsonResponse(activity_summary(end - timedelta(days=days - 1), end))
@@ -63,6 +63,7 @@ INSTALLED_APPS = [
     'ticket',
     'forum',
     'schedule',
+    'backfill',
 ]
 
 SOCIALACCOUNT_PROVIDERS = {
@@ -113,6 +114,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'forum.context_processors.forum_categories',
             ],
         },
     },
@@ -146,6 +148,32 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # Threaded tests need real file locking; shared-cache in-memory
+            # databases fail concurrent writers with "table is locked".
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
+    }
+
+
+# Cache
+# Invalidation (news facets/feed state, forum categories, merch facets and leaderboards) and
+# management commands only reach other processes through a shared cache, so production must
+# not use the per-process LocMem default. REDIS_URL (needs the `redis` package) is shared across
+# hosts and has atomic incr; otherwise production uses a file cache shared by the workers of
+# one host. runserver is a single process, so development keeps LocMem.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+elif PRODUCTION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_DIR', '/tmp/garuda_spot_cache'),
+            'OPTIONS': {'MAX_ENTRIES': 20000},
         }
     }
 
@@ -210,3 +238,12 @@ ACCOUNT_DEFAULT_HTTP_PROTOCOL = "https" if PRODUCTION else "http"
 SOCIALACCOUNT_LOGIN_ON_GET = True
 USE_X_FORWARDED_HOST = True
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+
+# Forum: spread like increments over N counter rows per post (0 = update Post.like_count directly).
+# Needs `manage.py fold_like_shards` on a schedule to fold them back.
+FORUM_LIKE_SHARDS = int(os.getenv('FORUM_LIKE_SHARDS', '0'))
+
+# Merch: detail views are buffered (in the cache with REDIS_URL or another Redis/memcached cache,
+# else in the MerchView table) and need `manage.py flush_merch_views` on a schedule; a detail
+# request also flushes them at most once per this many seconds (0 = only the command does).
+MERCH_VIEW_FLUSH_SECONDS = int(os.getenv('MERCH_VIEW_FLUSH_SECONDS', '60'))
@@ -1,4 +1,5 @@
 from django.contrib import admin
-from .models import Merch
+from .models import Merch, MerchViewBucket
 
 admin.site.register(Merch)
+admin.site.register(MerchViewBucket)
@@ -0,0 +1,184 @@
+"""
+View counting for merch detail pages. Views are write-behind in both
+modes below: the request path never writes the Merch row, and
+`flush_views` moves pending views into Merch.view_count with one UPDATE
+per chunk, so the "popular" sort works off flushed values. Run
+`manage.py flush_merch_views` on a schedule; with
+settings.MERCH_VIEW_FLUSH_SECONDS > 0 a detail request also flushes at
+most once per that window.
+
+With a cache that every process shares and that increments atomically
+(settings.CACHES on Redis, i.e. REDIS_URL, or memcached), a view only
+increments a per-item counter in the cache, and the view that takes a
+counter off zero appends the item to a dirty log so a flush reads back
+only those items. Any other backend would lose buffered views (LocMem is
+per process and emptied on restart, the file cache's incr is a
+read-modify-write), so there a view is one INSERT into the append-only
+MerchView log, which the flush claims with DELETE ... RETURNING and
+aggregates. Flushed views also feed the trending buckets and scores.
+"""
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Merch, MerchView
+from .trending import current_hour, record_views, refresh_leaderboard
+
+VIEW_KEY = "merch:views:{}"
+VIEW_KEY_TIMEOUT = 60 * 60 * 24 * 7  # orphaned counters of deleted items expire
+DIRTY_SEQ_KEY = "merch:views:dirty"  # slots handed out so far
+DIRTY_SLOT_KEY = "merch:views:dirty:{}"  # slot -> merch id
+DIRTY_DONE_KEY = "merch:views:dirty:done"  # (first slot to read, last slot the previous flush saw)
+FLUSH_LOCK_KEY = "merch:views:flushed"
+FLUSH_CHUNK = 500
+VIEW_LOG_CHUNK = 5000  # MerchView rows claimed per transaction
+
+
+def buffering_enabled():
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], (RedisCache, BaseMemcachedCache))
+
+
+def record_view(merch):
+    """Count one view of `merch`; returns the view count to show for it."""
+    if buffering_enabled():
+        pending = _incr(VIEW_KEY.format(merch.pk), VIEW_KEY_TIMEOUT)
+        if pending == 1:
+            _mark_dirty(merch.pk)
+    else:
+        MerchView.objects.create(merch_id=merch.pk)
+        pending = None
+    interval = getattr(settings, "MERCH_VIEW_FLUSH_SECONDS", 0)
+    if interval > 0 and cache.add(FLUSH_LOCK_KEY, True, interval):
+        flush_views()
+        # the loaded row predates the flush; re-read it so flushed views still show
+        merch.view_count = Merch.objects.filter(pk=merch.pk).values_list("view_count", flat=True).first() or 0
+        pending = None
+    return merch.view_count + (pending_views(merch.pk) if pending is None else pending)
+
+
+def pending_views(pk):
+    if buffering_enabled():
+        return max(cache.get(VIEW_KEY.format(pk), 0), 0)
+    return MerchView.objects.filter(merch_id=pk).count()
+
+
+def _incr(key, timeout):
+    if cache.add(key, 1, timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:  # evicted between add and incr
+        cache.add(key, 1, timeout)
+        return 1
+
+
+def _mark_dirty(pk):
+    cache.set(DIRTY_SLOT_KEY.format(_incr(DIRTY_SEQ_KEY, None)), pk, VIEW_KEY_TIMEOUT)
+
+
+def _take_dirty_ids():
+    """
+    Read and clear the dirty log. A slot that is handed out but not written
+    yet (its view is still in flight) is retried by the next flush; if it is
+    still empty then, it was evicted and is skipped.
+    """
+    seq = cache.get(DIRTY_SEQ_KEY, 0)
+    first, seen = cache.get(DIRTY_DONE_KEY, (1, 0))
+    if seq < first - 1:  # the sequence was evicted and restarted
+        first, seen = 1, 0
+    ids, retry = set(), None
+    for start in range(first, seq + 1, FLUSH_CHUNK):
+        slots = range(start, min(start + FLUSH_CHUNK, seq + 1))
+        keys = [DIRTY_SLOT_KEY.format(slot) for slot in slots]
+        found = cache.get_many(keys)
+        ids.update(found.values())
+        cache.delete_many(list(found))
+        if retry is None:
+            retry = next((s for s, key in zip(slots, keys) if key not in found and s > seen), None)
+    cache.set(DIRTY_DONE_KEY, (retry or seq + 1, seq), None)
+    return ids
+
+
+def _take(pk, n):
+    """Atomically remove up to `n` views from the item's counter; returns how many were removed."""
+    key = VIEW_KEY.format(pk)
+    try:
+        left = cache.decr(key, n)
+    except ValueError:  # evicted since it was read
+        return 0
+    taken = n
+    if left < 0:  # a concurrent flush took some of them first
+        overdrawn = min(n, -left)
+        left = cache.incr(key, overdrawn)
+        taken = n - overdrawn
+    if left > 0:
+        # views arrived since the read; their incr never saw zero, so log the item again
+        _mark_dirty(pk)
+    return taken
+
+
+def _claim_view_log():
+    """
+    Delete up to VIEW_LOG_CHUNK of the oldest logged views and return
+    ({hour: {merch_id: views}}, rows claimed). DELETE ... RETURNING hands
+    every row to exactly one concurrent flush; call it inside the
+    transaction that applies the views.
+    """
+    field = MerchView._meta.get_field("viewed_at")
+    qn = connection.ops.quote_name
+    table = qn(MerchView._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE id IN (SELECT id FROM {table} ORDER BY id LIMIT %s) "
+            f"RETURNING {qn(MerchView._meta.get_field('merch').column)}, {qn(field.column)}",
+            [VIEW_LOG_CHUNK],
+        )
+        rows = cursor.fetchall()
+    converters = connection.ops.get_db_converters(field.cached_col)
+    views = defaultdict(Counter)
+    for pk, viewed_at in rows:
+        for converter in converters:
+            viewed_at = converter(viewed_at, field.cached_col, connection)
+        views[current_hour(viewed_at)][pk] += 1
+    return views, len(rows)
+
+
+def _apply_views(deltas, hour):
+    Merch.objects.filter(pk__in=deltas).update(
+        view_count=F("view_count") + Case(
+            *[When(pk=pk, then=Value(n)) for pk, n in deltas.items()],
+            default=Value(0), output_field=IntegerField(),
+        )
+    )
+    record_views(deltas, hour)
+
+
+def flush_views():
+    """Move pending views (the view log, then the dirty cache counters) into Merch.view_count. Returns the number flushed."""
+    flushed, claimed = 0, VIEW_LOG_CHUNK
+    while claimed == VIEW_LOG_CHUNK:
+        with transaction.atomic():
+            views, claimed = _claim_view_log()
+            for hour, deltas in sorted(views.items()):
+                _apply_views(deltas, hour)
+                flushed += sum(deltas.values())
+
+    ids = sorted(_take_dirty_ids())
+    hour = current_hour()
+    for i in range(0, len(ids), FLUSH_CHUNK):
+        keys = {VIEW_KEY.format(pk): pk for pk in ids[i:i + FLUSH_CHUNK]}
+        deltas = {}
+        for key, n in cache.get_many(keys).items():
+            if n > 0 and (taken := _take(keys[key], n)):
+                deltas[keys[key]] = taken
+        if deltas:
+            _apply_views(deltas, hour)
+            flushed += sum(deltas.values())
+    if flushed:
+        refresh_leaderboard()
+    return flushed
@@ -0,0 +1,92 @@
+"""
+In-process facet index over the merch catalog (category x vendor x price
+bucket). It is built from one query. Every facet value maps to a bitset
+(a Python int, bit i = i-th item), so a filter combination is an AND of
+a few ints and counts are popcounts. Facet counts are disjunctive: each
+facet is counted under the other facets' filters, so the numbers say
+what picking that value would return.
+
+The index only answers counts; catalog pages filter on the same buckets
+in SQL. merch.views calls `invalidate_facets` on create/update/delete.
+That bumps a generation number in the cache, and a process rebuilds its
+index on its next read. This reaches every worker only with the shared
+cache production configures in settings.CACHES; under the development
+LocMem default it reaches the current process only.
+"""
+import threading
+
+from django.core.cache import cache
+
+from .models import Merch
+
+GENERATION_KEY = "merch:facets:generation"
+# slug -> [lo, hi) in rupiah; hi None = open-ended
+PRICE_BUCKETS = {
+    "under-100k": (0, 100_000),
+    "100k-250k": (100_000, 250_000),
+    "250k-500k": (250_000, 500_000),
+    "500k-plus": (500_000, None),
+}
+FACETS = ("category", "vendor", "price")
+
+
+def price_bucket(price):
+    for slug, (lo, hi) in PRICE_BUCKETS.items():
+        if price >= lo and (hi is None or price < hi):
+            return slug
+    return None
+
+
+class FacetIndex:
+    def __init__(self, rows):
+        """`rows` are (id, category, vendor, price) tuples."""
+        self.ids = []
+        self.bits = {facet: {} for facet in FACETS}
+        for i, (pk, category, vendor, price) in enumerate(rows):
+            self.ids.append(pk)
+            bit = 1 << i
+            for facet, value in zip(FACETS, (category, vendor, price_bucket(price))):
+                self.bits[facet][value] = self.bits[facet].get(value, 0) | bit
+        self.all = (1 << len(self.ids)) - 1
+
+    def match(self, **selected):
+        """Bitset of the items matching every selected facet value (None/"" = any)."""
+        mask = self.all
+        for facet, value in selected.items():
+            if value:
+                mask &= self.bits[facet].get(value, 0)
+        return mask
+
+    def counts(self, **selected):
+        """{facet: {value: n}} where each facet ignores its own selection."""
+        result = {}
+        for facet in FACETS:
+            others = self.match(**{f: v for f, v in selected.items() if f != facet})
+            result[facet] = {
+                value: n for value, bits in sorted(self.bits[facet].items())
+                if (n := (bits & others).bit_count())
+            }
+        return result
+
+
+_lock = threading.Lock()
+_state = {"generation": None, "index": None}
+
+
+def facet_index():
+    generation = cache.get(GENERATION_KEY, 0)
+    if _state["generation"] != generation:
+        with _lock:
+            if _state["generation"] != generation:
+                rows = Merch.objects.order_by("-id").values_list("id", "category", "vendor", "price")
+                _state["index"], _state["generation"] = FacetIndex(rows), generation
+    return _state["index"]
+
+
+def invalidate_facets():
+    if not cache.add(GENERATION_KEY, 1, None):
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:  # evicted between add and incr
+            cache.add(GENERATION_KEY, 1, None)
+    _state["generation"] = None
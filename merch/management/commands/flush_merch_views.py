@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from merch.counters import flush_views
+
+
+class Command(BaseCommand):
+    help = "Flush buffered merch detail views from the cache into Merch.view_count."
+
+    def handle(self, *args, **options):
+        views = flush_views()
+        self.stdout.write(self.style.SUCCESS(f"Flushed {views} views"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from merch.trending import rebuild_trending
+
+
+class Command(BaseCommand):
+    help = "Prune expired merch view buckets, recompute trending scores from the rest and re-cache the leaderboard."
+
+    def handle(self, *args, **options):
+        pruned, scored = rebuild_trending()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {pruned} buckets, scored {scored} items"))
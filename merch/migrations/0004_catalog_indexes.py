@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merch', '0003_merch_view_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='merch',
+            index=models.Index(fields=['category', 'price'], name='merch_merch_categor_32b8cb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='merch',
+            index=models.Index(fields=['category', 'view_count'], name='merch_merch_categor_cd65dd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='merch',
+            index=models.Index(fields=['category', 'id'], name='merch_merch_categor_47cb2c_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merch', '0004_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MerchViewBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='merch',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='merch',
+            index=models.Index(fields=['-trending_score'], name='merch_merch_trendin_b781a0_idx'),
+        ),
+        migrations.AddField(
+            model_name='merchviewbucket',
+            name='merch',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_buckets', to='merch.merch'),
+        ),
+        migrations.AddIndex(
+            model_name='merchviewbucket',
+            index=models.Index(fields=['hour'], name='merch_merch_hour_ad0ca7_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='merchviewbucket',
+            constraint=models.UniqueConstraint(fields=('merch', 'hour'), name='merch_viewbucket_unique'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merch', '0005_merch_trending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MerchView',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('viewed_at', models.DateTimeField(auto_now_add=True)),
+                ('merch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_views', to='merch.merch')),
+            ],
+        ),
+    ]
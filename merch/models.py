@@ -20,6 +20,39 @@ class Merch(models.Model):
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='others')
     link = models.URLField(blank=True, default='')
     view_count = models.PositiveIntegerField(default=0) 
+    # log2 of exponentially decayed recent views; see merch.trending
+    trending_score = models.FloatField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["category", "price"]),
+            models.Index(fields=["category", "view_count"]),
+            models.Index(fields=["category", "id"]),
+            models.Index(fields=["-trending_score"]),
+        ]
     
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+
+class MerchViewBucket(models.Model):
+    """Views of one item flushed during one hour; pruned by refresh_merch_trending."""
+    merch = models.ForeignKey(Merch, on_delete=models.CASCADE, related_name="view_buckets")
+    hour = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["merch", "hour"], name="merch_viewbucket_unique")]
+        indexes = [models.Index(fields=["hour"])]
+
+    def __str__(self):
+        return f"{self.merch_id}@{self.hour:%Y-%m-%d %H}:00: {self.views}"
+
+
+class MerchView(models.Model):
+    """One detail view waiting for flush_views, when the cache cannot buffer views; see merch.counters."""
+    merch = models.ForeignKey(Merch, on_delete=models.CASCADE, related_name="pending_views")
+    viewed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.merch_id}@{self.viewed_at:%Y-%m-%d %H:%M}"
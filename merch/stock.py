@@ -0,0 +1,31 @@
+"""
+Stock reservation. Each item is taken with a conditional
+`UPDATE ... SET stock = stock - n WHERE id = ... AND stock >= n`, so the
+row is only touched when enough stock is left: concurrent buyers can never
+drive it below zero, and nobody holds an explicit row lock. A batch runs in
+one transaction and is all-or-nothing; items are updated in pk order so two
+overlapping batches lock rows in the same order.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from .models import Merch
+
+MAX_BATCH_ITEMS = 50
+
+
+def reserve_stock(quantities):
+    """
+    Take `quantities` ({merch_id: n}) out of stock. Returns (True, {id: stock left})
+    on success, or (False, [ids short of stock or missing]) with nothing reserved.
+    """
+    failed = []
+    with transaction.atomic():
+        for pk, n in sorted(quantities.items()):
+            if not Merch.objects.filter(pk=pk, stock__gte=n).update(stock=F("stock") - n):
+                failed.append(pk)
+        if failed:
+            transaction.set_rollback(True)
+            return False, failed
+        left = dict(Merch.objects.filter(pk__in=quantities).values_list("pk", "stock"))
+    return True, left
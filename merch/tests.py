@@ -1,14 +1,23 @@
-from django.test import TestCase, Client, RequestFactory, override_settings
+from django.test import TestCase, TransactionTestCase, Client, RequestFactory, override_settings
+from django.db import connection
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from unittest.mock import patch, MagicMock
-from .models import Merch
-from . import views
+from django.core.cache import cache
+from django.core.management import call_command
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.utils import timezone
+from .models import Merch, MerchView, MerchViewBucket
+from . import counters, trending, views
+from .stock import reserve_stock
 import json
 
 TEMPLATE_DICT = {
     "merch_main.html": "{% for m in list_merch %}{{ m.name }}|{% endfor %}",
     "merch_detail.html": "{{ merch.name }} (views={{ merch.view_count }})",
+    "merch_cards.html": "{% for m in list_merch %}{{ m.name }}|{% endfor %}",
 }
 
 @override_settings(
@@ -23,6 +32,7 @@ TEMPLATE_DICT = {
 )
 class MerchTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.factory = RequestFactory()
         self.m1 = Merch.objects.create(
@@ -64,6 +74,135 @@ class MerchTests(TestCase):
         parts = [p for p in resp.content.decode().split("|") if p.strip()]
         self.assertEqual(parts, ["Beta Jersey", "Gamma Hoodie", "Alpha Cap"])
 
+    def test_catalog_cursor_walks_every_sort(self):
+        for i in range(5):
+            Merch.objects.create(name=f"Tie {i}", vendor="T", price=150, stock=1, category="cap", view_count=1)
+        trending.record_views({m.pk: m.pk % 3 + 1 for m in Merch.objects.all()}, timezone.now())
+        expected = {
+            "recent": Merch.objects.order_by("-id"),
+            "price_asc": Merch.objects.order_by("price", "id"),
+            "price_desc": Merch.objects.order_by("-price", "-id"),
+            "popular": Merch.objects.order_by("-view_count", "-id"),
+            "trending": Merch.objects.order_by("-trending_score", "-id"),
+        }
+        with patch("merch.views.MERCH_PER_PAGE", 3):
+            for sort, qs in expected.items():
+                seen, cursor, pages = [], "", 0
+                while True:
+                    data = self.client.get(
+                        reverse("merch:show_merch_partial"), {"sort": sort, "cursor": cursor}
+                    ).json()
+                    seen += [p for p in data["html"].split("|") if p]
+                    pages += 1
+                    self.assertEqual(data["has_next"], bool(data["next_cursor"]))
+                    if not data["has_next"]:
+                        break
+                    cursor = data["next_cursor"]
+                self.assertEqual(seen, [m.name for m in qs], sort)
+                self.assertEqual(pages, 3)
+
+    def test_catalog_partial_filters_by_category(self):
+        data = self.client.get(reverse("merch:show_merch_partial"), {"filter": "cap", "cursor": "bogus"}).json()
+        self.assertEqual(data["html"], "Alpha Cap|")
+        self.assertFalse(data["has_next"])
+        self.assertEqual(data["next_cursor"], "")
+
+    def test_facets_counts_and_invalidation(self):
+        Merch.objects.create(name="Pricey Cap", vendor="B", price=300_000, stock=1, category="cap", description="")
+        url = reverse("merch:merch_facets")
+        with self.assertNumQueries(1):
+            data = self.client.get(url, {"filter": "cap"}).json()
+        with self.assertNumQueries(0):
+            self.client.get(url, {"filter": "cap", "vendor": "B", "price": "250k-500k"})
+        self.assertEqual(data["total"], 2)
+        self.assertEqual(data["facets"]["category"], {"cap": 2, "hoodie": 1, "jersey": 1})
+        self.assertEqual(data["facets"]["vendor"], {"A": 1, "B": 1})
+        self.assertEqual(data["facets"]["price"], {"250k-500k": 1, "under-100k": 1})
+
+        data = self.client.get(url, {"vendor": "B"}).json()
+        self.assertEqual(data["total"], 2)
+        self.assertEqual(data["facets"]["category"], {"cap": 1, "jersey": 1})
+        self.assertEqual(data["facets"]["vendor"], {"A": 1, "B": 2, "C": 1})
+
+        # pages filter in SQL, without the index
+        with self.assertNumQueries(1):
+            resp = self.client.get(reverse("merch:show_merch_partial"), {"vendor": "B", "price": "under-100k"})
+        self.assertEqual(resp.json()["html"], "Beta Jersey|")
+        resp = self.client.get(reverse("merch:show_merch_partial"), {"price": "250k-500k", "filter": "cap"})
+        self.assertEqual(resp.json()["html"], "Pricey Cap|")
+
+        self.client.force_login(self.user)
+        self.client.post(reverse("merch:update_merch", args=[self.m1.id]), {"vendor": "B"})
+        self.assertEqual(self.client.get(url, {"vendor": "B"}).json()["total"], 3)
+        self.client.post(reverse("merch:create_merch"), {"name": "New", "vendor": "B", "category": "scarf"})
+        self.assertEqual(self.client.get(url, {"vendor": "B"}).json()["total"], 4)
+        with patch.object(type(self.user), "is_admin", True, create=True):
+            self.client.post(reverse("merch:delete_merch", args=[self.m2.id]))
+        self.assertEqual(self.client.get(url, {"vendor": "B"}).json()["facets"]["category"], {"cap": 2, "scarf": 1})
+
+    def test_trending_decays_and_serves_from_cache(self):
+        now = timezone.now()
+        trending.record_views({self.m1.id: 10}, now - timedelta(days=3))  # weighs 10/8
+        trending.record_views({self.m2.id: 2}, now)
+        trending.record_views({self.m3.id: 1}, now - timedelta(days=1))
+        trending.record_views({self.m3.id: 1}, now)
+        self.assertEqual(MerchViewBucket.objects.filter(merch=self.m3).count(), 2)
+        trending.refresh_leaderboard()
+        with self.assertNumQueries(0):
+            data = self.client.get(reverse("merch:merch_trending")).json()
+        self.assertEqual([r["name"] for r in data["items"]], ["Beta Jersey", "Gamma Hoodie", "Alpha Cap"])
+
+        # one locking read, one upsert for new and existing buckets, one score UPDATE (+ savepoint)
+        with self.assertNumQueries(5):
+            trending.record_views({self.m1.id: 1, self.m3.id: 2, 10**9: 3}, now)
+        self.assertEqual(
+            sorted(MerchViewBucket.objects.filter(hour=trending.current_hour(now)).values_list("merch_id", "views")),
+            [(self.m1.id, 1), (self.m2.id, 2), (self.m3.id, 3)],
+        )
+
+        # incremental scores match a full recompute; expired buckets are pruned
+        incremental = dict(Merch.objects.values_list("pk", "trending_score"))
+        MerchViewBucket.objects.create(merch=self.m2, hour=trending.current_hour(now) - timedelta(days=8), views=0)
+        out = StringIO()
+        call_command("refresh_merch_trending", stdout=out)
+        self.assertIn("Pruned 1 buckets, scored 3 items", out.getvalue())
+        for pk, score in Merch.objects.values_list("pk", "trending_score"):
+            self.assertAlmostEqual(score, incremental[pk], places=5)
+
+    @override_settings(MERCH_VIEW_FLUSH_SECONDS=0)
+    @patch("merch.counters.buffering_enabled", lambda: True)
+    def test_flush_feeds_hourly_buckets(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("merch:detail", args=[self.m3.id]))
+        self.client.get(reverse("merch:detail", args=[self.m3.id]))
+        self.assertEqual(self.client.get(reverse("merch:merch_trending")).json()["items"], [])
+        counters.flush_views()
+        bucket = MerchViewBucket.objects.get()
+        self.assertEqual((bucket.merch_id, bucket.views), (self.m3.id, 2))
+        items = self.client.get(reverse("merch:merch_trending")).json()["items"]
+        self.assertEqual([r["id"] for r in items], [self.m3.id])
+
+    def test_reserve_merch_single_and_batch(self):
+        url = reverse("merch:reserve_merch")
+        self.assertIn(self.client.post(url, {"id": self.m1.id}).status_code, (301, 302))
+        self.client.force_login(self.user)
+
+        resp = self.client.post(url, {"id": self.m1.id, "quantity": 2})
+        self.assertEqual(resp.json(), {"reserved": True, "stock": {str(self.m1.id): 3}})
+
+        resp = self.client.post(url, {"id": [self.m1.id, self.m2.id, self.m1.id], "quantity": [1, 3, 1]})
+        self.assertEqual(resp.json()["stock"], {str(self.m1.id): 1, str(self.m2.id): 0})
+
+        # all-or-nothing: m3 has stock but m2 is sold out
+        resp = self.client.post(url, {"id": [self.m3.id, self.m2.id]})
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.json()["insufficient"], [self.m2.id])
+        self.assertEqual(Merch.objects.get(pk=self.m3.id).stock, 7)
+
+        self.assertEqual(self.client.post(url, {"id": [self.m1.id], "quantity": [0]}).status_code, 400)
+        self.assertEqual(self.client.post(url, {"id": [self.m1.id, self.m2.id], "quantity": [1]}).status_code, 400)
+        self.assertEqual(self.client.post(url, {}).status_code, 400)
+
     def test_create_merch_requires_login(self):
         resp = self.client.post(reverse("merch:create_merch"), {})
         self.assertIn(resp.status_code, (301, 302))
@@ -123,14 +262,102 @@ class MerchTests(TestCase):
         self.assertEqual(data["stock"], 0)
         self.assertEqual(data["category"], "jersey")
 
+    @override_settings(MERCH_VIEW_FLUSH_SECONDS=0)
+    def test_detail_logs_views_without_shared_cache(self):
+        self.client.force_login(self.user)
+        self.assertFalse(counters.buffering_enabled())  # LocMem is per process
+        resp = self.client.get(reverse("merch:detail", args=[self.m2.id]))
+        self.assertIn("Beta Jersey (views=3)", resp.content.decode())
+
+        # one INSERT into the view log (plus the pending count); the Merch row is not written
+        with self.assertNumQueries(2) as ctx:
+            self.assertEqual(counters.record_view(self.m2), 4)
+        self.assertEqual([q["sql"].split()[0] for q in ctx.captured_queries], ["INSERT", "SELECT"])
+        self.m2.refresh_from_db()
+        self.assertEqual((self.m2.view_count, MerchView.objects.count()), (2, 2))
+
+        out = StringIO()
+        call_command("flush_merch_views", stdout=out)
+        self.assertIn("Flushed 2 views", out.getvalue())
+        self.m2.refresh_from_db()
+        self.assertEqual((self.m2.view_count, MerchView.objects.count()), (4, 0))
+        self.assertEqual(MerchViewBucket.objects.get(merch=self.m2).views, 2)
+        self.assertGreater(self.m2.trending_score, 0)
+        self.assertEqual(counters.flush_views(), 0)
+
+    def test_view_log_is_claimed_in_chunks(self):
+        MerchView.objects.bulk_create([MerchView(merch=m) for m in (self.m1, self.m1, self.m3)])
+        with patch("merch.counters.VIEW_LOG_CHUNK", 2):
+            self.assertEqual(counters.flush_views(), 3)
+        self.assertEqual(
+            list(Merch.objects.order_by("pk").values_list("view_count", flat=True)), [2, 2, 2]
+        )
+
+    @override_settings(MERCH_VIEW_FLUSH_SECONDS=0)
+    @patch("merch.counters.buffering_enabled", lambda: True)
     def test_detail_increments_view_count(self):
         self.client.force_login(self.user)
         before = Merch.objects.get(pk=self.m1.id).view_count
         resp = self.client.get(reverse("merch:detail", args=[self.m1.id]))
         self.assertEqual(resp.status_code, 200)
+        self.assertIn(f"Alpha Cap (views={before + 1})", resp.content.decode())
+        self.m1.refresh_from_db()
+        self.assertEqual(self.m1.view_count, before)  # buffered, not written
+
+        self.client.get(reverse("merch:detail", args=[self.m2.id]))
+        self.client.get(reverse("merch:detail", args=[self.m2.id]))
+        out = StringIO()
+        call_command("flush_merch_views", stdout=out)
+        self.assertIn("Flushed 3 views", out.getvalue())
+        self.m1.refresh_from_db()
+        self.m2.refresh_from_db()
+        self.assertEqual((self.m1.view_count, self.m2.view_count), (before + 1, 4))
+        self.assertEqual(counters.flush_views(), 0)
+
+        # only items viewed since the last flush are read back
+        self.client.get(reverse("merch:detail", args=[self.m2.id]))
+        with patch.object(counters.cache, "get_many", wraps=counters.cache.get_many) as get_many:
+            self.assertEqual(counters.flush_views(), 1)
+        self.assertEqual(get_many.call_args_list[-1].args[0], {counters.VIEW_KEY.format(self.m2.id): self.m2.id})
+
+    @override_settings(MERCH_VIEW_FLUSH_SECONDS=60)
+    @patch("merch.counters.buffering_enabled", lambda: True)
+    def test_detail_flushes_views_once_per_window(self):
+        self.client.force_login(self.user)
+        shown = [
+            self.client.get(reverse("merch:detail", args=[self.m1.id])).content.decode() for _ in range(3)
+        ]
+        self.assertEqual(shown, [f"Alpha Cap (views={n})" for n in (1, 2, 3)])
         self.m1.refresh_from_db()
-        self.assertEqual(self.m1.view_count, before + 1)
-        self.assertIn("Alpha Cap", resp.content.decode())
+        self.assertEqual(self.m1.view_count, 1)  # first request flushed, the rest are buffered
+        self.assertEqual(counters.pending_views(self.m1.id), 2)
+
+    def test_take_never_goes_negative(self):
+        key = counters.VIEW_KEY.format(self.m1.id)
+        self.assertEqual(counters._take(self.m1.id, 3), 0)  # evicted: nothing to take
+        cache.set(key, 2)
+        self.assertEqual(counters._take(self.m1.id, 5), 2)  # a concurrent flush already took the rest
+        self.assertEqual(cache.get(key), 0)
+
+    @override_settings(MERCH_VIEW_FLUSH_SECONDS=0)
+    @patch("merch.counters.buffering_enabled", lambda: True)
+    def test_view_during_flush_is_logged_again(self):
+        counters.record_view(self.m1)
+        decr = cache.decr
+
+        def view_then_decr(key, delta=1, version=None):
+            counters.record_view(self.m1)  # lands between the flush's read and its decr
+            return decr(key, delta, version)
+
+        with patch.object(counters.cache, "decr", view_then_decr):
+            self.assertEqual(counters.flush_views(), 1)
+        self.assertEqual(counters.pending_views(self.m1.id), 1)
+        self.assertEqual(counters.flush_views(), 1)
+        for _ in range(5):
+            counters.record_view(self.m1)
+        self.assertEqual(counters.flush_views(), 5)
+        self.assertEqual(Merch.objects.get(pk=self.m1.id).view_count, 7)
+        self.assertEqual(counters.pending_views(self.m1.id), 0)
 
     def test_delete_merch_method_and_permissions(self):
         self.client.force_login(self.user)
@@ -202,4 +429,23 @@ class MerchTests(TestCase):
     def test_admin_and_apps_import(self):
         import merch.admin as _adm
         from merch.apps import MerchConfig
-        self.assertEqual(MerchConfig.name, "merch")
\ No newline at end of file
+        self.assertEqual(MerchConfig.name, "merch")
+
+
+class ReserveStockConcurrencyTests(TransactionTestCase):
+    def _reserve(self, quantities):
+        try:
+            return reserve_stock(quantities)[0]
+        finally:
+            connection.close()
+
+    def test_threads_never_oversell(self):
+        m = Merch.objects.create(name="Drop", vendor="V", stock=25, description="")
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(self._reserve, [{m.id: 1}] * 60 + [{m.id: 3}] * 10))
+        m.refresh_from_db()
+        sold = sum(1 for ok in results[:60] if ok) + 3 * sum(1 for ok in results[60:] if ok)
+        self.assertEqual(sold, 25 - m.stock)
+        self.assertLessEqual(sold, 25)
+        self.assertGreaterEqual(m.stock, 0)
+        self.assertLess(m.stock, 3)  # no request was refused while stock was still available
@@ -0,0 +1,132 @@
+"""
+Trending merch. merch.counters' flush adds the flushed views to an hourly
+bucket per item (MerchViewBucket) and folds them into
+Merch.trending_score in the same batch (`record_views`); a detail request
+never touches either table.
+
+The score is log2(sum of views * 2^((hour - TRENDING_EPOCH) / HALF_LIFE_HOURS)).
+Exponential decay is implicit: a view counts twice as much as one
+HALF_LIFE_HOURS older. Scores never need rescaling and only change when
+views arrive. Adding a bucket is a log-space add, so each flush updates
+the score incrementally.
+
+`refresh_merch_trending` prunes buckets past BUCKET_RETENTION and
+recomputes scores from the rest. The leaderboard is cached whole for
+LEADERBOARD_TIMEOUT and refreshed after every flush/refresh, so serving it
+is usually a single cache read. The timeout bounds how stale a worker's
+copy can get when the cache is not shared (see settings.CACHES). The
+catalog's sort=trending pages through the same score.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Case, FloatField, Value, When
+from django.utils import timezone
+
+from .models import Merch, MerchViewBucket
+
+TRENDING_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+HALF_LIFE_HOURS = 24
+BUCKET_RETENTION = timedelta(days=7)  # older views weigh < 1/128 of fresh ones
+LEADERBOARD_SIZE = 20
+LEADERBOARD_KEY = "merch:trending"
+LEADERBOARD_TIMEOUT = 5 * 60
+LEADERBOARD_FIELDS = ("id", "name", "vendor", "price", "thumbnail", "category")
+SCORE_CHUNK = 500
+BUCKET_CHUNK = 300  # 3 parameters per row, under SQLite's 999-variable limit
+
+
+def current_hour(now=None):
+    return (now or timezone.now()).replace(minute=0, second=0, microsecond=0)
+
+
+def bucket_score(hour, views):
+    return math.log2(views) + (hour - TRENDING_EPOCH).total_seconds() / 3600 / HALF_LIFE_HOURS
+
+
+def _log2_add(a, b):
+    """log2(2^a + 2^b), with 0 standing for "no views yet"."""
+    if not a or not b:
+        return a or b
+    hi, lo = max(a, b), min(a, b)
+    return hi + math.log2(1 + 2 ** (lo - hi))
+
+
+def _set_scores(scores):
+    items = list(scores.items())
+    for i in range(0, len(items), SCORE_CHUNK):
+        chunk = dict(items[i:i + SCORE_CHUNK])
+        Merch.objects.filter(pk__in=chunk).update(trending_score=Case(
+            *[When(pk=pk, then=Value(round(score, 7))) for pk, score in chunk.items()],
+            output_field=FloatField(),
+        ))
+
+
+def _add_to_buckets(deltas, hour):
+    """INSERT ... ON CONFLICT DO UPDATE, so new and existing buckets take one statement per chunk."""
+    qn = connection.ops.quote_name
+    meta = MerchViewBucket._meta
+    table = qn(meta.db_table)
+    merch_col, hour_col, views_col = (qn(meta.get_field(f).column) for f in ("merch", "hour", "views"))
+    hour = meta.get_field("hour").get_db_prep_value(hour, connection)
+    items = list(deltas.items())
+    with connection.cursor() as cursor:
+        for i in range(0, len(items), BUCKET_CHUNK):
+            chunk = items[i:i + BUCKET_CHUNK]
+            cursor.execute(
+                f"INSERT INTO {table} ({merch_col}, {hour_col}, {views_col}) "
+                f"VALUES {', '.join(['(%s, %s, %s)'] * len(chunk))} "
+                f"ON CONFLICT ({merch_col}, {hour_col}) DO UPDATE SET {views_col} = {table}.{views_col} + excluded.{views_col}",
+                [param for pk, n in chunk for param in (pk, hour, n)],
+            )
+
+
+def record_views(deltas, hour):
+    """Add {merch_id: views} to the buckets for `hour` and fold them into trending_score."""
+    hour = current_hour(hour)
+    items = sorted(deltas.items())
+    for i in range(0, len(items), SCORE_CHUNK):
+        chunk = dict(items[i:i + SCORE_CHUNK])
+        with transaction.atomic():
+            # the row locks serialize concurrent flushes of an item, so no score update is lost
+            scores = dict(
+                Merch.objects.select_for_update().filter(pk__in=chunk).order_by("pk").values_list("pk", "trending_score")
+            )
+            if not scores:  # deleted since they were viewed
+                continue
+            _add_to_buckets({pk: chunk[pk] for pk in scores}, hour)
+            _set_scores({pk: _log2_add(score, bucket_score(hour, chunk[pk])) for pk, score in scores.items()})
+
+
+def refresh_leaderboard():
+    rows = list(
+        Merch.objects.filter(trending_score__gt=0).order_by("-trending_score", "-id")
+        .values(*LEADERBOARD_FIELDS)[:LEADERBOARD_SIZE]
+    )
+    cache.set(LEADERBOARD_KEY, rows, LEADERBOARD_TIMEOUT)
+    return rows
+
+
+def leaderboard():
+    rows = cache.get(LEADERBOARD_KEY)
+    return refresh_leaderboard() if rows is None else rows
+
+
+def invalidate_leaderboard():
+    cache.delete(LEADERBOARD_KEY)
+
+
+def rebuild_trending(now=None):
+    """Prune expired buckets and recompute every score from the rest. Returns (pruned, scored)."""
+    pruned, _ = MerchViewBucket.objects.filter(hour__lt=current_hour(now) - BUCKET_RETENTION).delete()
+    scores = defaultdict(float)
+    for pk, hour, views in MerchViewBucket.objects.filter(views__gt=0).values_list("merch_id", "hour", "views").iterator():
+        scores[pk] = _log2_add(scores[pk], bucket_score(hour, views))
+    with transaction.atomic():
+        Merch.objects.filter(trending_score__gt=0).update(trending_score=0)
+        _set_scores(scores)
+    refresh_leaderboard()
+    return pruned, len(scores)
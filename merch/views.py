@@ -1,14 +1,29 @@
 from django.shortcuts import render, get_object_or_404
 from merch.models import Merch
+from merch.counters import record_view
+from merch.facets import PRICE_BUCKETS, facet_index, invalidate_facets
+from merch.stock import MAX_BATCH_ITEMS, reserve_stock
+from merch.trending import invalidate_leaderboard, leaderboard
 from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest, HttpResponseNotAllowed
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods
 from django.utils.html import strip_tags
-from django.db.models import F
+from django.db.models import Q
+from django.template.loader import render_to_string
 
 
 ALLOWED_CATEGORIES = {"cap", "hoodie", "jacket", "jersey", "keychain", "scarf", "others"}
+UPDATE_FIELDS = ["name", "vendor", "description", "thumbnail", "link", "price", "stock", "category"]
+MERCH_PER_PAGE = 24
+# sort param -> (keyset field, descending); every order is tie-broken on id.
+SORT_KEYS = {
+    "recent": ("id", True),
+    "price_asc": ("price", False),
+    "price_desc": ("price", True),
+    "popular": ("view_count", True),
+    "trending": ("trending_score", True),
+}
 
 def to_int(val, default=0):
     try:
@@ -17,28 +32,67 @@ def to_int(val, default=0):
         return default
     return max(0, v)
 
-def show_merch(request):
-    filter_type = request.GET.get("filter", "all")
-    sort = request.GET.get("sort", "recent")
-    all_merch = Merch.objects.all()
+def _merch_page(params):
+    """One catalog page, keyset-paginated on (sort field, id); fetches one extra row for has_next."""
+    qs = Merch.objects.all()
+    filter_type = params.get("filter", "all")
     if filter_type in ALLOWED_CATEGORIES:
-        all_merch = all_merch.filter(category=filter_type)
+        qs = qs.filter(category=filter_type)
+    if params.get("vendor"):
+        qs = qs.filter(vendor=params["vendor"])
+    if params.get("price") in PRICE_BUCKETS:
+        lo, hi = PRICE_BUCKETS[params["price"]]
+        qs = qs.filter(price__gte=lo, **({} if hi is None else {"price__lt": hi}))
 
-    order_map = {
-        "recent": "-id",
-        "price_asc": "price",
-        "price_desc": "-price",
-        "popular": "-view_count",
-    }
-    all_merch = all_merch.order_by(order_map.get(sort, "-id"))
+    field, desc = SORT_KEYS.get(params.get("sort"), SORT_KEYS["recent"])
+    op, sign = ("lt", "-") if desc else ("gt", "")
+    qs = qs.order_by(f"{sign}{field}", *([] if field == "id" else [f"{sign}id"]))
+    try:
+        value, pk = params.get("cursor", "").rsplit(".", 1)
+        value, pk = (float if field == "trending_score" else int)(value), int(pk)
+    except ValueError:
+        pass
+    else:
+        qs = qs.filter(Q(**{f"{field}__{op}": value}) | Q(**{field: value, f"id__{op}": pk}))
+
+    rows = list(qs[:MERCH_PER_PAGE + 1])
+    items = rows[:MERCH_PER_PAGE]
+    next_cursor = f"{getattr(items[-1], field)}.{items[-1].id}" if len(rows) > MERCH_PER_PAGE else ""
+    return items, next_cursor
 
+def show_merch(request):
+    items, next_cursor = _merch_page(request.GET)
     context = {
         "name": request.user.username,
-        "list_merch": all_merch,
+        "list_merch": items,
+        "next_cursor": next_cursor,
     }
     
     return render(request, "merch_main.html", context)
 
+def show_merch_partial(request):
+    items, next_cursor = _merch_page(request.GET)
+    html = render_to_string("merch_cards.html", {"list_merch": items}, request=request)
+    return JsonResponse({"html": html, "has_next": bool(next_cursor), "next_cursor": next_cursor})
+
+def merch_facets(request):
+    """Total and per-facet counts for a filter combination, answered from the in-memory index."""
+    selected = {
+        "category": request.GET.get("filter") if request.GET.get("filter") in ALLOWED_CATEGORIES else "",
+        "vendor": request.GET.get("vendor", ""),
+        "price": request.GET.get("price") if request.GET.get("price") in PRICE_BUCKETS else "",
+    }
+    index = facet_index()
+    return JsonResponse({
+        "total": index.match(**selected).bit_count(),
+        "selected": selected,
+        "facets": index.counts(**selected),
+    })
+
+def merch_trending(request):
+    """The trending leaderboard, precomputed on every view flush."""
+    return JsonResponse({"items": leaderboard()})
+
 @login_required
 @require_http_methods(["POST"])
 def create_merch(request):
@@ -71,6 +125,7 @@ def create_merch(request):
         link=link,
     )
     merch.save()
+    invalidate_facets()
 
     data = {
         "id": merch.id,
@@ -118,7 +173,14 @@ def update_merch(request, id):
         if cat in ALLOWED_CATEGORIES:
             merch.category = cat
 
-    merch.save()
+    # Only write what was posted, so a stale form never clobbers stock taken by
+    # concurrent reservations (or flushed view counts).
+    fields = [f for f in UPDATE_FIELDS if f in request.POST]
+    if fields:
+        merch.save(update_fields=fields)
+        invalidate_leaderboard()
+        if {"category", "vendor", "price"} & set(fields):
+            invalidate_facets()
 
     data = {
         "id": merch.id,
@@ -133,15 +195,34 @@ def update_merch(request, id):
     }
     return JsonResponse(data)
 
+@login_required
+@require_http_methods(["POST"])
+def reserve_merch(request):
+    """Reserve stock for one or more items: repeated `id` fields, each with an optional `quantity` (default 1)."""
+    ids = request.POST.getlist("id")
+    counts = request.POST.getlist("quantity")
+    if not ids or len(ids) > MAX_BATCH_ITEMS or len(counts) not in (0, len(ids)):
+        return HttpResponseBadRequest("Send 1-%d 'id' fields, each with a 'quantity' or none at all" % MAX_BATCH_ITEMS)
+    quantities = {}
+    for i, raw_id in enumerate(ids):
+        pk, n = to_int(raw_id), to_int(counts[i]) if counts else 1
+        if not pk or not n:
+            return HttpResponseBadRequest("Ids and quantities must be positive integers")
+        quantities[pk] = quantities.get(pk, 0) + n
+
+    ok, result = reserve_stock(quantities)
+    if not ok:
+        return JsonResponse({"reserved": False, "insufficient": result}, status=409)
+    return JsonResponse({"reserved": True, "stock": {str(pk): n for pk, n in result.items()}})
+
 @login_required
 def detail(request, id):
     merch = get_object_or_404(Merch, pk=id)
 
+    merch.view_count = record_view(merch)
     context = {
         'merch': merch
     }
-    Merch.objects.filter(pk=id).update(view_count=F('view_count') + 1)
-    merch.refresh_from_db(fields=['view_count'])
 
     return render(request, "merch_detail.html", context)
 
@@ -155,6 +236,8 @@ def delete_merch(request, id):
 
     merch = get_object_or_404(Merch, pk=id)
     merch.delete()
+    invalidate_facets()
+    invalidate_leaderboard()
     return JsonResponse({"deleted": id}, status=200)
 
 def show_json(request):
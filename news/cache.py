@@ -0,0 +1,63 @@
+import hashlib
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models import Count
+
+from .models import News
+
+FACETS_CACHE_KEY = "news:facets"
+FACETS_CACHE_TIMEOUT = 60 * 60
+FEED_STATE_CACHE_KEY = "news:feed-state"
+# Rendered article + related list on news_detail.html; related lists drift as
+# articles are added, so keep this short.
+PAGE_CACHE_TIMEOUT = 60 * 15
+
+
+def get_facets():
+    data = cache.get(FACETS_CACHE_KEY)
+    if data is None:
+        data = _compute_facets()
+        cache.set(FACETS_CACHE_KEY, data, FACETS_CACHE_TIMEOUT)
+    return data
+
+
+def _compute_facets():
+    # One GROUP BY over (month, category); both facets are folded from it.
+    rows = News.objects.order_by().values("published_month", "category").annotate(n=Count("id"))
+    months, categories, total = {}, {}, 0
+    for r in rows:
+        if r["published_month"]:
+            months[r["published_month"]] = months.get(r["published_month"], 0) + r["n"]
+        categories[r["category"]] = categories.get(r["category"], 0) + r["n"]
+        total += r["n"]
+    return {
+        "months": [{"month": m, "count": months[m]} for m in sorted(months)],
+        "categories": [
+            {"category": c, "count": n}
+            for c, n in sorted(categories.items(), key=lambda kv: (-kv[1], kv[0]))
+        ],
+        "total": total,
+    }
+
+
+def get_feed_state(items):
+    """ETag/Last-Modified validators for the feeds, derived from the feed's `items` queryset."""
+    state = cache.get(FEED_STATE_CACHE_KEY)
+    if state is None:
+        rows = list(items.values_list("id", "updated_at"))
+        digest = hashlib.sha1("|".join(f"{pk}:{ts.isoformat()}" for pk, ts in rows).encode()).hexdigest()
+        state = {
+            "etag": f'"{digest}"',
+            "last_modified": max((ts for _, ts in rows), default=None),
+        }
+        cache.set(FEED_STATE_CACHE_KEY, state, FACETS_CACHE_TIMEOUT)
+    return state
+
+
+def invalidate_news_caches():
+    cache.delete_many([FACETS_CACHE_KEY, FEED_STATE_CACHE_KEY])
+
+
+def invalidate_news_pages(*news_ids):
+    cache.delete_many([make_template_fragment_key("news_article", [pk]) for pk in news_ids])
@@ -0,0 +1,66 @@
+from django.contrib.syndication.views import Feed
+from django.db.models import F
+from django.urls import reverse, reverse_lazy
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import condition
+
+from .cache import get_feed_state
+from .models import News
+
+FEED_SIZE = 20
+
+
+def latest_news():
+    return News.objects.order_by(F("published_at").desc(nulls_last=True), "-id")[:FEED_SIZE]
+
+
+class LatestNewsFeed(Feed):
+    title = "GarudaSpot - Berita Terkini"
+    link = reverse_lazy("news:show_main")
+    description = "Berita terbaru sepak bola Indonesia"
+
+    def items(self):
+        return latest_news().only(
+            "id", "title", "category", "excerpt", "published_at", "updated_at"
+        )
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt
+
+    def item_link(self, item):
+        return reverse("news:show_news", args=[item.id])
+
+    def item_guid(self, item):
+        return str(item.id)
+
+    item_guid_is_permalink = False
+
+    def item_categories(self, item):
+        return [item.category]
+
+    def item_pubdate(self, item):
+        return item.published_at or item.updated_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+
+class LatestNewsAtomFeed(LatestNewsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestNewsFeed.description
+
+
+def _etag(request, *args, **kwargs):
+    return get_feed_state(latest_news())["etag"]
+
+
+def _last_modified(request, *args, **kwargs):
+    return get_feed_state(latest_news())["last_modified"]
+
+
+# 304s are answered from the cached feed state, before the feed is generated.
+rss_feed = condition(etag_func=_etag, last_modified_func=_last_modified)(LatestNewsFeed())
+atom_feed = condition(etag_func=_etag, last_modified_func=_last_modified)(LatestNewsAtomFeed())
@@ -0,0 +1,199 @@
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from news.cache import invalidate_news_caches, invalidate_news_pages
+from news.models import News
+from news.related import index_news, rebuild_related
+
+READ_CHUNK = 64 * 1024
+UPSERT_FIELDS = [
+    "title", "category", "publish_date", "content", "article_url", "article_url_hash",
+    "published_at", "published_month", "excerpt", "reading_time", "updated_at",
+]
+
+
+def _skip_separators(buf, pos):
+    while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ","):
+        pos += 1
+    return pos
+
+
+def iter_json_array(fp):
+    """Yield the elements of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def fill():
+        nonlocal buf, pos, eof
+        more = fp.read(READ_CHUNK)
+        if not more:
+            eof = True
+        buf, pos = buf[pos:] + more, 0
+
+    fill()
+    pos = _skip_separators(buf, pos)
+    if buf[pos:pos + 1] != "[":
+        raise CommandError("Expected a JSON array")
+    pos += 1
+    while True:
+        pos = _skip_separators(buf, pos)
+        if pos >= len(buf):
+            if eof:
+                raise CommandError("Unexpected end of JSON array")
+            fill()
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise CommandError(f"Malformed JSON near offset {pos}")
+            fill()
+            continue
+        yield obj
+        pos = end
+
+
+def iter_ndjson(fp):
+    for lineno, line in enumerate(fp, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise CommandError(f"Line {lineno}: {e}")
+
+
+def iter_records(fp):
+    head = fp.read(READ_CHUNK).lstrip()
+    fp.seek(0)
+    return iter_json_array(fp) if head.startswith("[") else iter_ndjson(fp)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream news articles from a JSON array or NDJSON file and upsert them in batches, "
+        "deduplicated by article_url (idempotent). Related articles are indexed per batch, "
+        "or rebuilt once at the end with --defer-related."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?",
+            default=str(Path(settings.BASE_DIR) / "static" / "data" / "dataset.json"),
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--defer-related", action="store_true",
+            help="Skip per-batch related indexing and run rebuild_related once at the end (bulk imports).",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        batch_size = max(1, options["batch_size"])
+        if not path.exists():
+            raise CommandError(f"{path} does not exist")
+
+        self.totals = {"created": 0, "updated": 0, "skipped": 0}
+        self.defer_related = options["defer_related"]
+        started = time.monotonic()
+        seen = 0
+        batch = []
+        with path.open(encoding="utf-8") as fp:
+            for record in iter_records(fp):
+                seen += 1
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    self._flush(batch)
+                    batch = []
+                    self._progress(seen, started)
+            if batch:
+                self._flush(batch)
+                self._progress(seen, started)
+
+        if self.defer_related:
+            rebuild_related(stdout=self.stdout)
+        invalidate_news_caches()
+        self.stdout.write(self.style.SUCCESS(
+            "Ingested {seen} records: {created} created, {updated} updated, {skipped} skipped".format(
+                seen=seen, **self.totals
+            )
+        ))
+
+    def _progress(self, seen, started):
+        rate = seen / max(time.monotonic() - started, 1e-6)
+        self.stdout.write(f"  {seen} records processed ({rate:.0f}/s)")
+
+    def _flush(self, records):
+        by_hash, valid = {}, 0
+        now = timezone.now()
+        for x in records:
+            if not isinstance(x, dict):
+                self.totals["skipped"] += 1
+                continue
+            n = News(
+                title=(x.get("title") or "")[:300],
+                category=(x.get("category") or "General")[:100],
+                publish_date=(x.get("publish_date") or "")[:100],
+                article_url=(x.get("article_url") or "").strip(),
+                content=x.get("content") or "",
+                updated_at=now,
+            )
+            n.fill_derived_fields()
+            if not (n.title and n.content and n.article_url_hash):
+                self.totals["skipped"] += 1
+                continue
+            valid += 1
+            by_hash[n.article_url_hash] = n  # last occurrence in the batch wins
+
+        existing = dict(
+            News.objects.filter(article_url_hash__in=by_hash).values_list("article_url_hash", "id")
+        )
+        # Rows seeded before article_url was stored: adopt them instead of duplicating.
+        pending = [n for h, n in by_hash.items() if h not in existing]
+        legacy = {}
+        if pending:
+            for pk, title, publish_date in News.objects.filter(
+                article_url_hash__isnull=True, title__in={n.title for n in pending}
+            ).values_list("id", "title", "publish_date"):
+                legacy.setdefault((title, publish_date), pk)
+
+        to_create, to_update = [], []
+        for h, n in by_hash.items():
+            pk = existing.get(h) or legacy.pop((n.title, n.publish_date), None)
+            if pk:
+                n.id = pk
+                to_update.append(n)
+            else:
+                to_create.append(n)
+
+        raced = []
+        with transaction.atomic():
+            if to_update:
+                News.objects.bulk_update(to_update, UPSERT_FIELDS)
+            if to_create:
+                # Rows a concurrent ingest inserted since `existing` was read take the
+                # conflict path below: they are updates, not creations.
+                raced = list(News.objects.filter(
+                    article_url_hash__in=[n.article_url_hash for n in to_create]
+                ).values_list("id", flat=True))
+                News.objects.bulk_create(
+                    to_create,
+                    update_conflicts=True,
+                    unique_fields=["article_url_hash"],
+                    update_fields=[f for f in UPSERT_FIELDS if f != "article_url_hash"],
+                )
+            if not self.defer_related:
+                index_news(to_update + to_create)
+        invalidate_news_pages(*(n.id for n in to_update), *raced)
+        self.totals["created"] += len(to_create) - len(raced)
+        self.totals["updated"] += len(to_update) + len(raced)
+        self.totals["skipped"] += valid - len(by_hash)
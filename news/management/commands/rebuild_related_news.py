@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from news.related import RELATED_K, rebuild_related
+
+
+class Command(BaseCommand):
+    help = "Recompute TF-IDF postings and the top-k related articles for every News row."
+
+    def add_arguments(self, parser):
+        parser.add_argument("-k", type=int, default=RELATED_K)
+
+    def handle(self, *args, **options):
+        total = rebuild_related(k=max(1, options["k"]), stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt related articles for {total} news"))
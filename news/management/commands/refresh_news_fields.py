@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from backfill.models import BackfillProgress
+from backfill.runner import DEFAULT_CHUNK_SIZE, run_backfill
+from news.cache import invalidate_news_caches
+from news.models import News
+
+BACKFILL_NAME = "news.derived_fields"
+DERIVED_FIELDS = [
+    "article_url_hash", "published_at", "published_month", "excerpt", "reading_time",
+]
+
+
+def _refresh(n):
+    before = [getattr(n, f) for f in DERIVED_FIELDS]
+    n.fill_derived_fields()
+    if [getattr(n, f) for f in DERIVED_FIELDS] == before:
+        return False
+    # bulk_update skips auto_now; bump it so feed ETags/Last-Modified see the change.
+    n.updated_at = timezone.now()
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute News columns derived from publish_date/content/article_url in pk-ordered, "
+        "resumable chunks (e.g. after changing the date parser)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--restart", action="store_true", help="Ignore an unfinished checkpoint.")
+
+    def handle(self, *args, **options):
+        # An interrupted run resumes from its checkpoint; a finished one starts over.
+        finished = BackfillProgress.objects.filter(name=BACKFILL_NAME, completed_at__isnull=False).exists()
+        processed = run_backfill(
+            BACKFILL_NAME,
+            News.objects.all(),
+            _refresh,
+            DERIVED_FIELDS + ["updated_at"],
+            chunk_size=max(1, options["chunk_size"]),
+            stdout=self.stdout,
+            restart=options["restart"] or finished,
+        )
+        invalidate_news_caches()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {processed} news rows"))
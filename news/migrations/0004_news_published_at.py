@@ -0,0 +1,66 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import re
+
+from django.db import migrations, models
+
+MONTH_MAP = {
+    "jan":1,"januari":1,
+    "feb":2,"februari":2,
+    "mar":3,"maret":3,
+    "apr":4,"april":4,
+    "mei":5,"may":5,
+    "jun":6,"juni":6,
+    "jul":7,"juli":7,
+    "agu":8,"agustus":8,"aug":8,"august":8,
+    "sep":9,"september":9,
+    "okt":10,"oct":10,"oktober":10,"october":10,
+    "nov":11,"november":11,
+    "des":12,"dec":12,"desember":12,"december":12,
+}
+WIB = ZoneInfo("Asia/Jakarta")
+BATCH_SIZE = 500
+
+def parse_published_at(s: str):
+    if not s: return None
+    s = re.sub(r"^[A-Za-zÀ-ÿ]+,\s*", "", s.strip())
+    m = re.search(r"(\d{1,2})\s+([A-Za-zÀ-ÿ\.]+|\d{1,2})\s+(20\d{2})(?:\s+(\d{1,2}):(\d{2}))?", s)
+    if not m: return None
+    d, mon_s, y, hh, mm = m.groups()
+    mon = int(mon_s) if mon_s.isdigit() else MONTH_MAP.get(mon_s.lower().strip("."))
+    if not mon: return None
+    try:
+        return datetime(int(y), mon, int(d), int(hh or 0), int(mm or 0), tzinfo=WIB)
+    except ValueError:
+        return None
+
+def forwards(apps, schema_editor):
+    News = apps.get_model("news", "News")
+    batch = []
+    for n in News.objects.only("id", "publish_date").iterator(chunk_size=BATCH_SIZE):
+        n.published_at = parse_published_at(n.publish_date or "")
+        if n.published_at:
+            batch.append(n)
+        if len(batch) >= BATCH_SIZE:
+            News.objects.bulk_update(batch, ["published_at"])
+            batch = []
+    if batch:
+        News.objects.bulk_update(batch, ["published_at"])
+
+def backwards(apps, schema_editor):
+    pass
+
+class Migration(migrations.Migration):
+    dependencies = [("news", "0003_published_month")]
+    operations = [
+        migrations.AddField(
+            model_name="news",
+            name="published_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="news",
+            index=models.Index(fields=["published_month", "published_at"], name="news_news_publish_196776_idx"),
+        ),
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+EXCERPT_LENGTH = 200
+WORDS_PER_MINUTE = 200
+BATCH_SIZE = 500
+
+def make_excerpt(content: str) -> str:
+    text = " ".join((content or "").split())
+    return text if len(text) <= EXCERPT_LENGTH else text[:EXCERPT_LENGTH].rstrip() + "…"
+
+def forwards(apps, schema_editor):
+    News = apps.get_model("news", "News")
+    batch = []
+    for n in News.objects.only("id", "content").iterator(chunk_size=BATCH_SIZE):
+        n.excerpt = make_excerpt(n.content)
+        n.reading_time = max(1, -(-len((n.content or "").split()) // WORDS_PER_MINUTE))
+        batch.append(n)
+        if len(batch) >= BATCH_SIZE:
+            News.objects.bulk_update(batch, ["excerpt", "reading_time"])
+            batch = []
+    if batch:
+        News.objects.bulk_update(batch, ["excerpt", "reading_time"])
+
+def backwards(apps, schema_editor):
+    pass
+
+class Migration(migrations.Migration):
+    dependencies = [("news", "0004_news_published_at")]
+    operations = [
+        migrations.AddField(
+            model_name="news",
+            name="excerpt",
+            field=models.CharField(blank=True, editable=False, max_length=201),
+        ),
+        migrations.AddField(
+            model_name="news",
+            name="reading_time",
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.RunPython(forwards, backwards),
+    ]
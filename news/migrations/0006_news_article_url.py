@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [("news", "0005_news_excerpt_reading_time")]
+    operations = [
+        migrations.AddField(
+            model_name="news",
+            name="article_url",
+            field=models.URLField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name="news",
+            name="article_url_hash",
+            field=models.CharField(editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_article_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('weight', models.FloatField()),
+                ('news', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='news.news')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term'], name='news_newste_term_a51a4b_idx')],
+                'constraints': [models.UniqueConstraint(fields=('news', 'term'), name='news_term_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RelatedNews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('news', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='news.news')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='news.news')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['news', '-score'], name='news_relate_news_id_1acd2c_idx')],
+                'constraints': [models.UniqueConstraint(fields=('news', 'related'), name='related_news_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,14 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [("news", "0007_related_news")]
+    operations = [
+        migrations.AddField(
+            model_name="news",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_news_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsTermSet',
+            fields=[
+                ('news', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='news.news')),
+                ('terms', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TermStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50, unique=True)),
+                ('df', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
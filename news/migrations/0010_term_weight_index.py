@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0009_term_stats'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='newsterm',
+            name='news_newste_term_a51a4b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='newsterm',
+            index=models.Index(fields=['term', '-weight'], name='news_newste_term_a1489b_idx'),
+        ),
+    ]
@@ -2,16 +2,80 @@
 import uuid
 from django.db import models
 
+from .utils import (
+    _extract_month, parse_published_at, make_excerpt, reading_time_minutes, hash_article_url,
+    EXCERPT_LENGTH,
+)
+
 class News(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=300)
     category = models.CharField(max_length=100)
     publish_date = models.CharField(max_length=100, blank=True)  # display
     published_month = models.PositiveSmallIntegerField(null=True, db_index=True)  # <-- NEW
+    published_at = models.DateTimeField(null=True, blank=True, db_index=True)  # parsed publish_date, for sorting
+    article_url = models.URLField(max_length=500, blank=True)
+    article_url_hash = models.CharField(max_length=64, unique=True, null=True, editable=False)  # ingest dedupe key
     content = models.TextField()
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH + 1, blank=True, editable=False)  # list projection
+    reading_time = models.PositiveSmallIntegerField(default=1, editable=False)  # minutes
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-id"]
+        indexes = [models.Index(fields=["published_month", "published_at"])]
+
+    def save(self, *args, **kwargs):
+        self.fill_derived_fields()
+        super().save(*args, **kwargs)
+
+    def fill_derived_fields(self):
+        """Recompute the columns derived from publish_date/content/article_url (bulk writes skip save())."""
+        self.article_url_hash = hash_article_url(self.article_url)
+        self.published_at = parse_published_at(self.publish_date)
+        if self.publish_date:
+            self.published_month = _extract_month(self.publish_date)
+        self.excerpt = make_excerpt(self.content)
+        self.reading_time = reading_time_minutes(self.content)
 
     def __str__(self):
         return self.title
+
+
+class NewsTerm(models.Model):
+    """One posting of an article's (truncated, L2-normalised) TF-IDF vector."""
+    news = models.ForeignKey(News, on_delete=models.CASCADE, related_name="terms")
+    term = models.CharField(max_length=50)
+    weight = models.FloatField()
+
+    class Meta:
+        indexes = [models.Index(fields=["term", "-weight"])]
+        constraints = [models.UniqueConstraint(fields=["news", "term"], name="news_term_unique")]
+
+
+class TermStat(models.Model):
+    """
+    Document frequency of a term over every indexed article (all of its
+    terms, not just the truncated postings). The row with term "" holds the
+    number of indexed articles.
+    """
+    term = models.CharField(max_length=50, unique=True)
+    df = models.IntegerField(default=0)
+
+
+class NewsTermSet(models.Model):
+    """The distinct terms an article is counted under in TermStat, so re-indexing or deleting can undo them."""
+    news = models.OneToOneField(News, on_delete=models.CASCADE, primary_key=True, related_name="+")
+    terms = models.TextField(blank=True)
+
+
+class RelatedNews(models.Model):
+    """Precomputed top-k neighbours of an article, ranked by cosine similarity."""
+    news = models.ForeignKey(News, on_delete=models.CASCADE, related_name="related_links")
+    related = models.ForeignKey(News, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ["-score"]
+        indexes = [models.Index(fields=["news", "-score"])]
+        constraints = [models.UniqueConstraint(fields=["news", "related"], name="related_news_unique")]
@@ -0,0 +1,275 @@
+"""
+Related-articles engine: TF-IDF over title + content, cosine similarity,
+top-k neighbours precomputed into RelatedNews so serving is one indexed
+lookup. `index_news` maintains it incrementally for new/edited articles;
+`rebuild_related` (the rebuild_related_news command) recomputes everything.
+
+Both paths take IDF from TermStat, the true per-term document frequency
+(postings are truncated to MAX_TERMS per article, so counting them would
+undercount common terms). Each article's term set is kept in NewsTermSet so
+re-indexing and `unindex_news` can take it back out. Very common terms are
+dropped from the vectors, and only the MAX_POSTINGS_PER_TERM heaviest
+postings of a term take part in scoring, which bounds the pairwise work.
+`index_news` ranks them in SQL on the (term, -weight) index, so a batch
+reads at most that many postings per term however large the corpus gets.
+"""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import News, NewsTerm, NewsTermSet, RelatedNews, TermStat
+
+RELATED_K = 5
+MAX_TERMS = 50          # postings kept per article (highest TF-IDF weights)
+TITLE_BOOST = 2
+WRITE_BATCH = 1000
+IN_CLAUSE_CHUNK = 900   # stay under SQLite's bound-parameter limit
+DOCS_TERM = ""          # TermStat row holding the number of indexed articles
+MAX_DF_FRACTION = 0.2   # terms in more of the articles than this are near-stopwords...
+DF_CUTOFF_MIN_DOCS = 1000  # ...once the corpus is big enough for that to mean anything
+MAX_POSTINGS_PER_TERM = 200
+
+STOPWORDS = frozenset("""
+    ada adalah agar akan aku anda antara apa atau bagi bahwa baru bisa bukan dalam dan dari
+    dengan di dia hal hanya harus hingga ia ini itu jadi juga kalau kami karena ke kembali
+    kita lagi lain lebih masih mau mereka milik namun oleh pada para saat saja sama sampai
+    satu sebagai sebelum sedang sejak sekarang selama seperti serta setelah sudah tak telah
+    tentang tersebut tetapi tidak untuk yang baca detik com video foto
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-zà-ÿ]{3,}")
+
+
+def term_counts(title: str, content: str) -> Counter:
+    counts = Counter()
+    for text, boost in ((title, TITLE_BOOST), (content, 1)):
+        for tok in _TOKEN_RE.findall((text or "").lower()):
+            if tok not in STOPWORDS and len(tok) <= 50:
+                counts[tok] += boost
+    return counts
+
+
+def tfidf_vector(counts: Counter, df: dict, total_docs: int) -> dict:
+    max_df = MAX_DF_FRACTION * total_docs if total_docs >= DF_CUTOFF_MIN_DOCS else total_docs
+    weights = {
+        t: (1 + math.log(c)) * (math.log((1 + total_docs) / (1 + df.get(t, 0))) + 1)
+        for t, c in counts.items() if df.get(t, 0) <= max_df
+    }
+    top = heapq.nlargest(MAX_TERMS, weights.items(), key=lambda kv: kv[1])
+    norm = math.sqrt(sum(w * w for _, w in top)) or 1.0
+    return {t: w / norm for t, w in top}
+
+
+def related_for(news, limit=RELATED_K):
+    return [
+        link.related
+        for link in RelatedNews.objects.filter(news=news)
+        .select_related("related")
+        .only("score", "related", "related__id", "related__title", "related__category",
+              "related__publish_date", "related__excerpt")[:limit]
+    ]
+
+
+def _chunked(values, size=IN_CLAUSE_CHUNK):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _score(vectors, postings):
+    """
+    Dot products of the articles in `vectors` against (news_id, term, weight)
+    postings, which must include each term's heaviest MAX_POSTINGS_PER_TERM
+    (`_top_postings`). Only those count, on both sides, in either path.
+    """
+    by_term = defaultdict(list)
+    for other, term, weight in postings:
+        by_term[term].append((weight, other))
+    scores = defaultdict(Counter)
+    for plist in by_term.values():
+        if len(plist) > MAX_POSTINGS_PER_TERM:
+            plist = heapq.nlargest(MAX_POSTINGS_PER_TERM, plist)
+        for w, pk in plist:
+            if pk in vectors:
+                for weight, other in plist:
+                    if other != pk:
+                        scores[pk][other] += w * weight
+    return scores
+
+
+def _top_postings(terms):
+    """(news_id, term, weight) of each term's MAX_POSTINGS_PER_TERM heaviest postings, ties as in `_score`."""
+    for chunk in _chunked(terms):
+        yield from NewsTerm.objects.filter(term__in=chunk).annotate(
+            rank=Window(RowNumber(), partition_by=F("term"), order_by=[F("weight").desc(), F("news_id").desc()])
+        ).filter(rank__lte=MAX_POSTINGS_PER_TERM).values_list("news_id", "term", "weight")
+
+
+def _apply_df(delta):
+    """Add a Counter of {term: change} to TermStat with one UPDATE per distinct change."""
+    TermStat.objects.bulk_create(
+        [TermStat(term=t) for t, d in delta.items() if d > 0], ignore_conflicts=True, batch_size=WRITE_BATCH
+    )
+    by_change = defaultdict(list)
+    for t, d in delta.items():
+        if d:
+            by_change[d].append(t)
+    for d, terms in by_change.items():
+        for chunk in _chunked(terms):
+            TermStat.objects.filter(term__in=chunk).update(df=F("df") + d)
+
+
+def _swap_term_sets(new_sets):
+    """Replace the term sets of the given articles (None = remove) and update TermStat to match."""
+    ids = list(new_sets)
+    old_sets = {}
+    for chunk in _chunked(ids):
+        old_sets.update(
+            (pk, terms.split()) for pk, terms in NewsTermSet.objects.filter(news_id__in=chunk).values_list("news_id", "terms")
+        )
+    delta = Counter()
+    for terms in new_sets.values():
+        if terms is not None:
+            delta.update(terms)
+    for terms in old_sets.values():
+        delta.subtract(terms)
+    delta[DOCS_TERM] += sum(terms is not None for terms in new_sets.values()) - len(old_sets)
+    _apply_df(delta)
+    for chunk in _chunked(ids):
+        NewsTermSet.objects.filter(news_id__in=chunk).delete()
+    NewsTermSet.objects.bulk_create(
+        [NewsTermSet(news_id=pk, terms=" ".join(sorted(terms))) for pk, terms in new_sets.items() if terms is not None],
+        batch_size=WRITE_BATCH,
+    )
+
+
+def _doc_frequencies(terms):
+    df = {}
+    for chunk in _chunked([DOCS_TERM, *terms]):
+        df.update(TermStat.objects.filter(term__in=chunk).values_list("term", "df"))
+    return df, df.pop(DOCS_TERM, 0)
+
+
+def unindex_news(ids):
+    """Take articles that are about to be deleted out of the document frequencies."""
+    with transaction.atomic():
+        _swap_term_sets(dict.fromkeys(ids))
+
+
+def index_news(items, k=RELATED_K):
+    """(Re)index the given articles and fold them into their neighbours' top-k lists."""
+    counts = {n.pk: term_counts(n.title, n.content) for n in items}
+    if not counts:
+        return
+    ids = list(counts)
+
+    with transaction.atomic():
+        _swap_term_sets({pk: set(c) for pk, c in counts.items()})
+        df, total = _doc_frequencies(set().union(*counts.values()))
+        vectors = {pk: tfidf_vector(c, df, total) for pk, c in counts.items()}
+
+        NewsTerm.objects.filter(news_id__in=ids).delete()
+        NewsTerm.objects.bulk_create(
+            [NewsTerm(news_id=pk, term=t, weight=w) for pk, vec in vectors.items() for t, w in vec.items()],
+            batch_size=WRITE_BATCH,
+        )
+        vec_terms = set().union(*(v.keys() for v in vectors.values()))
+        scores = _score(vectors, _top_postings(vec_terms))
+
+        RelatedNews.objects.filter(news_id__in=ids).delete()
+        _rescore_links_to(ids, scores)
+        rows, proposals = [], defaultdict(list)
+        for pk, cand in scores.items():
+            for other, s in cand.most_common(k):
+                rows.append(RelatedNews(news_id=pk, related_id=other, score=s))
+            # An article can enter lists of articles outside its own top-k.
+            for other, s in cand.most_common(k * 4):
+                if other not in counts:
+                    proposals[other].append((s, pk))
+        RelatedNews.objects.bulk_create(rows, batch_size=WRITE_BATCH)
+        _merge_reverse(proposals, k)
+
+
+def _rescore_links_to(ids, scores):
+    """Other articles' links to re-indexed ones: refresh the score, or drop the link if nothing is shared."""
+    to_update, to_delete = [], []
+    for chunk in _chunked(ids):
+        for row_id, news_id, related_id in RelatedNews.objects.filter(related_id__in=chunk).exclude(
+            news_id__in=ids
+        ).values_list("id", "news_id", "related_id"):
+            s = scores[related_id].get(news_id)
+            if s:
+                to_update.append(RelatedNews(id=row_id, score=s))
+            else:
+                to_delete.append(row_id)
+    RelatedNews.objects.bulk_update(to_update, ["score"], batch_size=WRITE_BATCH)
+    for chunk in _chunked(to_delete):
+        RelatedNews.objects.filter(id__in=chunk).delete()
+
+
+def _merge_reverse(proposals, k):
+    if not proposals:
+        return
+    current = defaultdict(list)
+    for row_id, news_id, related_id, score in RelatedNews.objects.filter(
+        news_id__in=proposals
+    ).values_list("id", "news_id", "related_id", "score"):
+        current[news_id].append((score, related_id, row_id))
+
+    to_delete, to_create = [], []
+    for news_id, offered in proposals.items():
+        existing = current[news_id]
+        have = {rel for _, rel, _ in existing}
+        merged = existing + [(s, pk, None) for s, pk in offered if pk not in have]
+        merged.sort(key=lambda x: x[0], reverse=True)
+        to_delete += [row_id for _, _, row_id in merged[k:] if row_id]
+        to_create += [
+            RelatedNews(news_id=news_id, related_id=pk, score=s)
+            for s, pk, row_id in merged[:k] if row_id is None
+        ]
+    if to_delete:
+        RelatedNews.objects.filter(id__in=to_delete).delete()
+    RelatedNews.objects.bulk_create(to_create, batch_size=WRITE_BATCH)
+
+
+def rebuild_related(k=RELATED_K, stdout=None):
+    """Full rebuild: one pass to count terms, in-memory inverted index, batched writes."""
+    counts, df = {}, Counter()
+    for pk, title, content in News.objects.values_list("id", "title", "content").iterator(chunk_size=WRITE_BATCH):
+        c = term_counts(title, content)
+        counts[pk] = c
+        df.update(c.keys())
+    total = len(counts)
+    vectors = {pk: tfidf_vector(c, df, total) for pk, c in counts.items()}
+    term_sets = [NewsTermSet(news_id=pk, terms=" ".join(sorted(c))) for pk, c in counts.items()]
+    del counts
+
+    postings = [(pk, t, w) for pk, vec in vectors.items() for t, w in vec.items()]
+    scores = _score(vectors, postings)
+
+    with transaction.atomic():
+        RelatedNews.objects.all().delete()
+        NewsTerm.objects.all().delete()
+        TermStat.objects.all().delete()
+        NewsTermSet.objects.all().delete()
+        df[DOCS_TERM] = total
+        TermStat.objects.bulk_create((TermStat(term=t, df=n) for t, n in df.items()), batch_size=WRITE_BATCH)
+        NewsTermSet.objects.bulk_create(term_sets, batch_size=WRITE_BATCH)
+        NewsTerm.objects.bulk_create(
+            (NewsTerm(news_id=pk, term=t, weight=w) for pk, t, w in postings), batch_size=WRITE_BATCH
+        )
+        RelatedNews.objects.bulk_create(
+            (
+                RelatedNews(news_id=pk, related_id=other, score=s)
+                for pk, cand in scores.items() for other, s in cand.most_common(k)
+            ),
+            batch_size=WRITE_BATCH,
+        )
+    if stdout:
+        stdout.write(f"  indexed {total} articles, {len(postings)} postings")
+    return total
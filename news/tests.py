@@ -2,15 +2,21 @@
 from __future__ import annotations
 import json
 import os
+import tempfile
 from datetime import datetime
+from io import StringIO
+from unittest.mock import patch
 from uuid import uuid4
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.cache.utils import make_template_fragment_key
 from django.test import TestCase, Client, RequestFactory, SimpleTestCase
 from django.urls import reverse
 
-from .models import News
-from . import views
+from .models import News, NewsTerm, RelatedNews, TermStat
+from . import related, utils, views
 
 
 class UtilsTests(SimpleTestCase):
@@ -44,12 +50,19 @@ class UtilsTests(SimpleTestCase):
         self.assertIsNone(views._parse_dt_for_sort("foo bar"))
         self.assertIsNone(views._parse_dt_for_sort(""))
 
+    def test_parse_published_at_is_aware_wib(self):
+        dt = utils.parse_published_at("Kamis, 09 Okt 2025 13:40 WIB")
+        self.assertIsNotNone(dt.tzinfo)
+        self.assertEqual(dt.utcoffset().total_seconds(), 7 * 3600)
+        self.assertIsNone(utils.parse_published_at("foo bar"))
+
 
 class BaseNewsTestCase(TestCase):
     def setUp(self):
         self.client = Client()
         self.rf = RequestFactory()
         User = get_user_model()
+        cache.clear()
         News.objects.all().delete()
         self.user = User.objects.create_user(username="user", password="p", role="USER")
         mig_admin_username = os.getenv("DJANGO_SUPERUSER_USERNAME", "admin")
@@ -103,6 +116,15 @@ class PublicAndHTMLViewsTests(BaseNewsTestCase):
         resp = self.client.get(reverse("news:show_main"))
         self.assertEqual(resp.status_code, 200)
 
+    def test_show_main_embeds_first_page_and_facets(self):
+        resp = self.client.get(reverse("news:show_main"))
+        initial = resp.context["initial_page"]
+        self.assertEqual([it["title"] for it in initial["items"]], ["A", "B", "C", "D"])
+        self.assertEqual(initial["page_size"], views.FIRST_PAGE_SIZE)
+        self.assertEqual(resp.context["facets"]["total"], 4)
+        self.assertContains(resp, 'id="initial-news"')
+        self.assertContains(resp, 'id="news-facets"')
+
     def test_show_news_requires_login(self):
         url = reverse("news:show_news", kwargs={"id": self.n1.id})
         resp = self.client.get(url)
@@ -111,6 +133,38 @@ class PublicAndHTMLViewsTests(BaseNewsTestCase):
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
 
+    def test_show_news_renders_article_once_and_caches_fragment(self):
+        self.client.login(username="user", password="p")
+        url = reverse("news:show_news", kwargs={"id": self.n1.id})
+        resp = self.client.get(url)
+        self.assertContains(resp, "content A")
+        self.assertNotContains(resp, "NEWS_DETAIL_ENDPOINT")
+        with patch("news.views.related_for") as related_for:
+            resp = self.client.get(url)
+        related_for.assert_not_called()
+        self.assertContains(resp, "content A")
+
+    def test_edit_and_delete_invalidate_cached_article(self):
+        url = reverse("news:show_news", kwargs={"id": self.n1.id})
+        self.client.login(username=self.admin_username, password=self.admin_password)
+        self.client.get(url)
+        self.client.post(
+            reverse("news:edit_news", kwargs={"id": self.n1.id}),
+            {"title": "A", "category": "Cat", "publish_date": "09 Okt 2025", "content": "edited body"},
+        )
+        self.assertContains(self.client.get(url), "edited body")
+        self.client.post(reverse("news:delete_news_ajax", kwargs={"id": self.n1.id}))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_delete_invalidates_pages_that_link_to_the_article(self):
+        RelatedNews.objects.create(news=self.n2, related=self.n1, score=1)
+        self.client.login(username=self.admin_username, password=self.admin_password)
+        url = reverse("news:show_news", kwargs={"id": self.n2.id})
+        self.client.get(url)
+        self.assertTrue(cache.get(make_template_fragment_key("news_article", [self.n2.id])))
+        self.client.post(reverse("news:delete_news", kwargs={"id": self.n1.id}))
+        self.assertIsNone(cache.get(make_template_fragment_key("news_article", [self.n2.id])))
+
     def test_create_edit_delete_require_admin(self):
         self.client.login(username="user", password="p")
         self.assertEqual(self.client.get(reverse("news:create_news")).status_code, 403)
@@ -132,6 +186,8 @@ class PublicAndHTMLViewsTests(BaseNewsTestCase):
             {"title": "A edited", "category": "Cat", "publish_date": "09 Okt 2025", "content": "content A"},
         )
         self.assertEqual(resp.status_code, 302)
+        self.n1.refresh_from_db()
+        self.assertEqual(self.n1.published_at, datetime(2025, 10, 9, tzinfo=utils.PUBLISH_TZ))
         resp = self.client.get(reverse("news:delete_news", kwargs={"id": self.n1.id}))
         self.assertEqual(resp.status_code, 302)
 
@@ -172,6 +228,57 @@ class APIJSONXMLTests(BaseNewsTestCase):
         self.assertFalse(data2["has_next"])
         self.assertEqual(data2["page"], 2)
 
+    def test_show_json_orders_by_published_at_in_sql(self):
+        self.assertIsNotNone(self.n1.published_at)
+        self.assertIsNone(self.n4.published_at)
+        with self.assertNumQueries(2):
+            resp = self.client.get(reverse("news:show_json") + "?page_size=1&page=2")
+        self.assertEqual([it["title"] for it in resp.json()["items"]], ["B"])
+
+    def test_show_json_list_projection_omits_content(self):
+        News.objects.create(title="Long", category="Cat", publish_date="10 Okt 2025", content="kata " * 450)
+        item = self.client.get(reverse("news:show_json")).json()["items"][0]
+        self.assertEqual(item["title"], "Long")
+        self.assertNotIn("content", item)
+        self.assertTrue(item["excerpt"].endswith("…"))
+        self.assertLessEqual(len(item["excerpt"]), 201)
+        self.assertEqual(item["reading_time"], 3)
+
+    def test_show_facets_counts_and_caches(self):
+        url = reverse("news:show_facets")
+        with self.assertNumQueries(1):
+            data = self.client.get(url).json()
+        self.assertEqual(data["total"], 4)
+        self.assertEqual(data["months"], [{"month": 5, "count": 1}, {"month": 9, "count": 1}, {"month": 10, "count": 1}])
+        self.assertEqual(data["categories"], [{"category": "Cat", "count": 4}])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).json(), data)
+
+    def test_rss_and_atom_feeds(self):
+        resp = self.client.get(reverse("news:rss_feed"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b"<rss", resp.content)
+        self.assertIn(self.n1.title.encode(), resp.content)
+        self.assertTrue(resp.has_header("ETag"))
+        self.assertTrue(resp.has_header("Last-Modified"))
+        atom = self.client.get(reverse("news:atom_feed"))
+        self.assertIn(b"http://www.w3.org/2005/Atom", atom.content)
+
+    def test_feed_conditional_get_returns_304_until_news_changes(self):
+        url = reverse("news:rss_feed")
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(resp.status_code, 304)
+        resp = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(resp.status_code, 304)
+
+        self.client.login(username=self.admin_username, password=self.admin_password)
+        self.client.post(reverse("news:delete_news_ajax", kwargs={"id": self.n2.id}))
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], first["ETag"])
+
     def test_show_json_by_id_ok_and_not_found(self):
         url_ok = reverse("news:show_json_by_id", kwargs={"news_id": self.n1.id})
         resp = self.client.get(url_ok)
@@ -211,6 +318,7 @@ class AJAXEndpointsTests(BaseNewsTestCase):
         obj_id = payload["id"]
         obj = News.objects.get(pk=obj_id)
         self.assertEqual(obj.published_month, 10)
+        self.assertEqual(obj.published_at, datetime(2025, 10, 1, tzinfo=utils.PUBLISH_TZ))
         resp_bad = self.client.post(url, {"title": "", "category": "", "content": ""})
         self.assertEqual(resp_bad.status_code, 400)
 
@@ -226,3 +334,160 @@ class AJAXEndpointsTests(BaseNewsTestCase):
         resp = self.client.post(url)
         self.assertEqual(resp.status_code, 200)
         self.assertFalse(News.objects.filter(id=self.n3.id).exists())
+
+    def test_ajax_writes_invalidate_facets(self):
+        facets_url = reverse("news:show_facets")
+        self.assertEqual(self.client.get(facets_url).json()["total"], 4)
+        self.client.login(username=self.admin_username, password=self.admin_password)
+        self.client.post(
+            reverse("news:add_news_entry_ajax"),
+            {"title": "X", "category": "Timnas", "publish_date": "01 Okt 2025", "content": "Body"},
+        )
+        data = self.client.get(facets_url).json()
+        self.assertEqual(data["total"], 5)
+        self.assertIn({"category": "Timnas", "count": 1}, data["categories"])
+        self.client.post(reverse("news:delete_news_ajax", kwargs={"id": self.n1.id}))
+        self.assertEqual(self.client.get(facets_url).json()["total"], 4)
+
+
+class IngestNewsCommandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        News.objects.all().delete()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as fp:
+            fp.write(text)
+        return path
+
+    def _ingest(self, path, **opts):
+        out = StringIO()
+        call_command("ingest_news", path, stdout=out, **opts)
+        return out.getvalue()
+
+    def _article(self, i, **extra):
+        return {
+            "title": f"T{i}", "category": "Sepakbola", "publish_date": "Rabu, 22 Okt 2025 05:00 WIB",
+            "article_url": f"https://sport.detik.com/a/{i}", "content": f"body {i}", **extra,
+        }
+
+    def test_json_array_is_streamed_deduped_and_idempotent(self):
+        rows = [self._article(i) for i in range(5)] + [self._article(0, content="newer")]
+        path = self._write("dump.json", json.dumps(rows, indent=2))
+        with patch("news.management.commands.ingest_news.READ_CHUNK", 16):
+            out = self._ingest(path, batch_size=2)
+        self.assertIn("5 created", out)
+        self.assertEqual(News.objects.count(), 5)
+        n0 = News.objects.get(title="T0")
+        self.assertEqual(n0.content, "newer")
+        self.assertEqual(n0.published_month, 10)
+        self.assertIsNotNone(n0.published_at)
+
+        out = self._ingest(path)
+        self.assertIn("0 created, 5 updated", out)
+        self.assertEqual(News.objects.count(), 5)
+
+    def test_ndjson_skips_rows_without_url_and_adopts_legacy_rows(self):
+        legacy = News.objects.create(title="T1", category="Old", publish_date="Rabu, 22 Okt 2025 05:00 WIB", content="x")
+        lines = [json.dumps(self._article(1)), "", json.dumps(self._article(2, article_url=""))]
+        out = self._ingest(self._write("dump.ndjson", "\n".join(lines)))
+        self.assertIn("0 created, 1 updated, 1 skipped", out)
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.category, "Sepakbola")
+        self.assertEqual(legacy.article_url, "https://sport.detik.com/a/1")
+        self.assertEqual(News.objects.count(), 1)
+
+    def test_defer_related_rebuilds_once_at_the_end(self):
+        rows = [self._article(i, content="Kluivert pelatih timnas") for i in range(4)]
+        path = self._write("dump.json", json.dumps(rows))
+        with patch("news.management.commands.ingest_news.index_news") as index_news:
+            out = self._ingest(path, batch_size=2, defer_related=True)
+        index_news.assert_not_called()
+        self.assertIn("indexed 4 articles", out)
+        self.assertEqual(RelatedNews.objects.values("news").distinct().count(), 4)
+
+    def test_non_object_records_are_skipped(self):
+        rows = ["just a string", [1, 2], self._article(1), None]
+        out = self._ingest(self._write("dump.json", json.dumps(rows)))
+        self.assertIn("Ingested 4 records: 1 created, 0 updated, 3 skipped", out)
+        self.assertEqual(News.objects.count(), 1)
+
+
+class RelatedNewsTests(TestCase):
+    def setUp(self):
+        News.objects.all().delete()
+        self.a = News.objects.create(title="Kluivert dipecat PSSI", category="Timnas", content="PSSI resmi memecat Kluivert pelatih timnas")
+        self.b = News.objects.create(title="Pengganti Kluivert", category="Timnas", content="PSSI mencari pelatih pengganti Kluivert untuk timnas")
+        self.c = News.objects.create(title="Harga cabai naik", category="Ekonomi", content="Harga cabai di pasar melonjak minggu ini")
+        related.rebuild_related()
+
+    def test_rebuild_links_similar_articles_only(self):
+        self.assertEqual([n.id for n in related.related_for(self.a)], [self.b.id])
+        self.assertEqual(related.related_for(self.c), [])
+        with self.assertNumQueries(1):
+            related.related_for(self.b)
+
+    def test_index_news_adds_new_article_to_neighbour_lists(self):
+        d = News.objects.create(title="Kluivert pamit dari timnas", category="Timnas", content="Kluivert pamit, PSSI berterima kasih")
+        related.index_news([d])
+        self.assertIn(self.a.id, [n.id for n in related.related_for(d)])
+        self.assertIn(d.id, [n.id for n in related.related_for(self.a)])
+        self.assertNotIn(d.id, [n.id for n in related.related_for(self.c)])
+
+    def test_index_news_keeps_top_k(self):
+        for i in range(4):
+            n = News.objects.create(title=f"Kluivert {i}", category="Timnas", content="PSSI Kluivert timnas pelatih")
+            related.index_news([n], k=2)
+        self.assertLessEqual(RelatedNews.objects.filter(news=self.a).count(), 2)
+
+    def _snapshot(self):
+        return (
+            dict(TermStat.objects.exclude(df=0).values_list("term", "df")),
+            # Older articles keep postings weighted with the IDF of their own indexing
+            # time, so scores drift slightly; the neighbour lists must not.
+            sorted(RelatedNews.objects.values_list("news_id", "related_id")),
+        )
+
+    def test_incremental_index_matches_rebuild(self):
+        d = News.objects.create(title="Kluivert pamit dari timnas", category="Timnas", content="Kluivert pamit, PSSI berterima kasih")
+        related.index_news([d])
+        self.a.content = "Harga cabai dan bawang naik di pasar"
+        self.a.save()
+        related.index_news([self.a])
+        incremental = self._snapshot()
+        self.assertEqual(TermStat.objects.get(term=related.DOCS_TERM).df, 4)
+        related.rebuild_related()
+        self.assertEqual(incremental, self._snapshot())
+
+    def test_edit_refreshes_links_pointing_at_the_article(self):
+        before = RelatedNews.objects.get(news=self.b, related=self.a).score
+        self.a.title, self.a.content = "Kabar pasar", "Harga cabai melonjak di pasar"
+        self.a.save()
+        related.index_news([self.a])
+        self.assertFalse(RelatedNews.objects.filter(news=self.b, related=self.a).exists())
+        self.assertGreater(before, 0)
+        self.assertIn(self.a.id, [n.id for n in related.related_for(self.c)])
+
+    def test_unindex_takes_article_out_of_document_frequencies(self):
+        pssi = TermStat.objects.get(term="pssi").df
+        related.unindex_news([self.b.id])
+        self.assertEqual(TermStat.objects.get(term="pssi").df, pssi - 1)
+        self.assertEqual(TermStat.objects.get(term=related.DOCS_TERM).df, 2)
+
+    def test_index_reads_only_heaviest_postings_per_term(self):
+        with patch("news.related.MAX_POSTINGS_PER_TERM", 1):
+            top = list(related._top_postings(["kluivert", "pssi"]))
+        heaviest = {
+            term: NewsTerm.objects.filter(term=term).order_by("-weight", "-news_id").values_list("news_id", "weight")[0]
+            for term in ("kluivert", "pssi")
+        }
+        self.assertEqual({t: (pk, w) for pk, t, w in top}, heaviest)
+        self.assertEqual(len(top), 2)
+
+    def test_scoring_only_uses_heaviest_postings_per_term(self):
+        with patch("news.related.MAX_POSTINGS_PER_TERM", 1):
+            related.rebuild_related()
+        self.assertFalse(RelatedNews.objects.exists())
@@ -1,9 +1,10 @@
 from django.urls import path
 from .views import (
     show_main, create_news, show_news, edit_news, delete_news,
-    show_json, show_json_by_id, show_xml, show_xml_by_id,
+    show_json, show_json_by_id, show_facets, show_xml, show_xml_by_id,
     add_news_entry_ajax, delete_news_ajax
 )
+from .feeds import rss_feed, atom_feed
 
 app_name = "news"
 
@@ -15,9 +16,12 @@ urlpatterns = [
     path("news/<uuid:id>/delete", delete_news, name="delete_news"),
 
     path("json/", show_json, name="show_json"),
+    path("json/facets/", show_facets, name="show_facets"),
     path("json/<uuid:news_id>/", show_json_by_id, name="show_json_by_id"),
     path("xml/", show_xml, name="show_xml"),
     path("xml/<uuid:news_id>/", show_xml_by_id, name="show_xml_by_id"),
+    path("rss/", rss_feed, name="rss_feed"),
+    path("atom/", atom_feed, name="atom_feed"),
 
     path("add/", add_news_entry_ajax, name="add_news_entry_ajax"),
     path("<uuid:id>/delete-ajax/", delete_news_ajax, name="delete_news_ajax"),
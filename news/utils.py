@@ -0,0 +1,80 @@
+import hashlib
+import re
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit
+from zoneinfo import ZoneInfo
+
+from django.utils import timezone
+
+# publish_date strings come from Indonesian sources and are stamped in WIB.
+PUBLISH_TZ = ZoneInfo("Asia/Jakarta")
+
+MONTH_MAP = {
+    "jan":1,"januari":1,"feb":2,"februari":2,"mar":3,"maret":3,"apr":4,"april":4,
+    "mei":5,"may":5,"jun":6,"juni":6,"jul":7,"juli":7,"agu":8,"agustus":8,"aug":8,"august":8,
+    "sep":9,"september":9,"okt":10,"oct":10,"oktober":10,"october":10,"nov":11,"november":11,
+    "des":12,"dec":12,"desember":12,"december":12,
+}
+def _extract_month(s: str):
+    if not s: return None
+    m = re.search(r"\d{1,2}\s+([A-Za-zÀ-ÿ\.]+)\s+20\d{2}", s) or \
+        re.search(r"\b([A-Za-zÀ-ÿ\.]+)\b\s+20\d{2}", s)
+    if not m: return None
+    return MONTH_MAP.get(m.group(1).lower().strip("."))
+
+
+def _parse_dt_for_sort(s: str) -> datetime | None:
+    """
+    Accepts strings like:
+    'Kamis, 09 Okt 2025 13:40 WIB' or '09 Okt 2025 13:40', etc.
+    Returns a datetime or None if it can’t be parsed.
+    """
+    if not s:
+        return None
+    s = re.sub(r"^[A-Za-zÀ-ÿ]+,\s*", "", s.strip())
+    m = re.search(r"(\d{1,2})\s+([A-Za-zÀ-ÿ\.]+|\d{1,2})\s+(20\d{2})(?:\s+(\d{1,2}):(\d{2}))?", s)
+    if not m:
+        return None
+    d, mon_s, y, hh, mm = m.groups()
+    try:
+        mon = int(mon_s)
+    except ValueError:
+        mon = MONTH_MAP.get(mon_s.lower().strip("."), None)
+    if not mon:
+        return None
+    h = int(hh) if hh else 0
+    mi = int(mm) if mm else 0
+    try:
+        return datetime(int(y), int(mon), int(d), h, mi)
+    except Exception:
+        return None
+
+
+def parse_published_at(s: str) -> datetime | None:
+    """Timezone-aware variant of `_parse_dt_for_sort` for the `published_at` column."""
+    dt = _parse_dt_for_sort(s)
+    if dt is None:
+        return None
+    return timezone.make_aware(dt, PUBLISH_TZ)
+
+
+EXCERPT_LENGTH = 200
+WORDS_PER_MINUTE = 200
+
+def make_excerpt(content: str, length: int = EXCERPT_LENGTH) -> str:
+    text = " ".join((content or "").split())
+    return text if len(text) <= length else text[:length].rstrip() + "…"
+
+def reading_time_minutes(content: str) -> int:
+    words = len((content or "").split())
+    return max(1, -(-words // WORDS_PER_MINUTE))
+
+
+def hash_article_url(url: str) -> str | None:
+    """sha256 of the article URL with the fragment dropped and the host lowercased."""
+    url = (url or "").strip()
+    if not url:
+        return None
+    parts = urlsplit(url)
+    normalized = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, ""))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
@@ -8,61 +8,74 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.utils.html import strip_tags
 from django.contrib.auth.decorators import login_required
+from django.db.models import F
+from django.utils.functional import SimpleLazyObject
 
 from .forms import NewsForm
-from .models import News
-from datetime import datetime
-import re
-
-MONTH_MAP = {
-    "jan":1,"januari":1,"feb":2,"februari":2,"mar":3,"maret":3,"apr":4,"april":4,
-    "mei":5,"may":5,"jun":6,"juni":6,"jul":7,"juli":7,"agu":8,"agustus":8,"aug":8,"august":8,
-    "sep":9,"september":9,"okt":10,"oct":10,"oktober":10,"october":10,"nov":11,"november":11,
-    "des":12,"dec":12,"desember":12,"december":12,
-}
-def _extract_month(s: str):
-    if not s: return None
-    m = re.search(r"\d{1,2}\s+([A-Za-zÀ-ÿ\.]+)\s+20\d{2}", s) or \
-        re.search(r"\b([A-Za-zÀ-ÿ\.]+)\b\s+20\d{2}", s)
-    if not m: return None
-    return MONTH_MAP.get(m.group(1).lower().strip("."))
-
-
-def _parse_dt_for_sort(s: str) -> datetime | None:
-    """
-    Accepts strings like:
-    'Kamis, 09 Okt 2025 13:40 WIB' or '09 Okt 2025 13:40', etc.
-    Returns a datetime or None if it can’t be parsed.
-    """
-    if not s:
-        return None
-    s = re.sub(r"^[A-Za-zÀ-ÿ]+,\s*", "", s.strip())
-    m = re.search(r"(\d{1,2})\s+([A-Za-zÀ-ÿ\.]+|\d{1,2})\s+(20\d{2})(?:\s+(\d{1,2}):(\d{2}))?", s)
-    if not m:
-        return None
-    d, mon_s, y, hh, mm = m.groups()
+from .models import News, RelatedNews
+from .cache import PAGE_CACHE_TIMEOUT, get_facets, invalidate_news_caches, invalidate_news_pages
+from .related import index_news, related_for, unindex_news
+from .utils import _extract_month, _parse_dt_for_sort
+
+# Listing projection: the full `content` body is only served by show_json_by_id.
+LIST_FIELDS = ("id", "title", "category", "publish_date", "excerpt", "reading_time")
+FIRST_PAGE_SIZE = 10  # keep in sync with PAGE_SIZE in main.html
+
+
+def _news_page(params):
+    month = params.get("month")
+    sort_order = (params.get("sort") or "desc").lower()
+    sort_reverse = False if sort_order == "asc" else True
+
+    qs = News.objects.all()
+    if month and month.isdigit():
+        qs = qs.filter(published_month=int(month))
+
+    if sort_reverse:
+        qs = qs.order_by(F("published_at").desc(nulls_last=True), "-id")
+    else:
+        qs = qs.order_by(F("published_at").asc(nulls_first=True), "id")
+
     try:
-        mon = int(mon_s)
+        page = max(1, int(params.get("page", 1)))
     except ValueError:
-        mon = MONTH_MAP.get(mon_s.lower().strip("."), None)
-    if not mon:
-        return None
-    h = int(hh) if hh else 0
-    mi = int(mm) if mm else 0
+        page = 1
     try:
-        return datetime(int(y), int(mon), int(d), h, mi)
-    except Exception:
-        return None
+        page_size = int(params.get("page_size", 20))
+    except ValueError:
+        page_size = 20
+    page_size = max(1, min(page_size, 100))
+
+    total = qs.count()
+    start = (page - 1) * page_size
+    end = start + page_size
+    page_items = list(qs.values(*LIST_FIELDS)[start:end])
 
+    return {
+        "items": page_items,
+        "page": page,
+        "page_size": page_size,
+        "has_next": end < total,
+        "total": total,
+    }
 
 
 def show_main(request):
-    return render(request, "main.html")
+    # First page and facet badges are embedded so the page needs no extra round trip.
+    return render(request, "main.html", {
+        "initial_page": _news_page({"page_size": FIRST_PAGE_SIZE}),
+        "facets": get_facets(),
+    })
 
 @login_required
 def show_news(request, id):
     news = get_object_or_404(News, pk=id)
-    return render(request, "news_detail.html", {"news": news})
+    return render(request, "news_detail.html", {
+        "news": news,
+        # Only queried when the cached article fragment has to be re-rendered.
+        "related": SimpleLazyObject(lambda: related_for(news)),
+        "page_cache_timeout": PAGE_CACHE_TIMEOUT,
+    })
 
 
 @login_required
@@ -72,7 +85,8 @@ def create_news(request):
 
     form = NewsForm(request.POST or None)
     if request.method == 'POST' and form.is_valid():
-        form.save()
+        index_news([form.save()])
+        invalidate_news_caches()
         return redirect('news:show_main')
     return render(request, "create_news.html", {"form": form})
 
@@ -84,7 +98,9 @@ def edit_news(request, id):
     news = get_object_or_404(News, pk=id)
     form = NewsForm(request.POST or None, instance=news)
     if request.method == 'POST' and form.is_valid():
-        form.save()
+        index_news([form.save()])
+        invalidate_news_caches()
+        invalidate_news_pages(news.id)
         return redirect('news:show_news', id=news.id)
     return render(request, "edit_news.html", {"form": form})
 
@@ -95,7 +111,12 @@ def delete_news(request, id):
         return HttpResponseForbidden("Admins only")
 
     news = get_object_or_404(News, pk=id)
+    # cached pages listing it under "Berita Terkait" would link to a 404
+    linking = list(RelatedNews.objects.filter(related_id=news.id).values_list("news_id", flat=True))
+    unindex_news([news.id])
     news.delete()
+    invalidate_news_caches()
+    invalidate_news_pages(id, *linking)
     return HttpResponseRedirect(reverse('news:show_main'))
 
 def show_xml(request):
@@ -107,45 +128,12 @@ from django.views.decorators.http import require_GET
 
 @require_GET
 def show_json(request):
-    month = request.GET.get("month")
-    sort_order = (request.GET.get("sort") or "desc").lower()
-    sort_reverse = False if sort_order == "asc" else True
-
-    qs = News.objects.all()
-    if month and month.isdigit():
-        qs = qs.filter(published_month=int(month))
-
-    items = list(qs.values("id", "title", "category", "publish_date", "content"))
-
-    for x in items:
-        x["_ts"] = _parse_dt_for_sort(x.get("publish_date", "")) or datetime.min
+    return JsonResponse(_news_page(request.GET))
 
-    items.sort(key=lambda x: x["_ts"], reverse=sort_reverse)
 
-    try:
-        page = int(request.GET.get("page", 1))
-    except ValueError:
-        page = 1
-    try:
-        page_size = int(request.GET.get("page_size", 20))
-    except ValueError:
-        page_size = 20
-    page_size = max(1, min(page_size, 100))
-
-    total = len(items)
-    start = (page - 1) * page_size
-    end = start + page_size
-    page_items = items[start:end]
-    for x in page_items:
-        x.pop("_ts", None)
-
-    return JsonResponse({
-        "items": page_items,
-        "page": page,
-        "page_size": page_size,
-        "has_next": end < total,
-        "total": total,
-    })
+@require_GET
+def show_facets(request):
+    return JsonResponse(get_facets())
 
 
 def show_xml_by_id(request, news_id):
@@ -164,6 +152,7 @@ def show_json_by_id(request, news_id):
         "category": n.category,
         "publish_date": n.publish_date,
         "content": n.content,
+        "reading_time": n.reading_time,
     }
     return JsonResponse(data)
 
@@ -189,6 +178,8 @@ def add_news_entry_ajax(request):
         published_month=_extract_month(publish_date),
         content=content,
     )
+    index_news([n])
+    invalidate_news_caches()
     return JsonResponse(
         {
             "id": str(n.id),
@@ -196,6 +187,8 @@ def add_news_entry_ajax(request):
             "category": n.category,
             "publish_date": n.publish_date,
             "content": n.content,
+            "excerpt": n.excerpt,
+            "reading_time": n.reading_time,
         },
         status=201,
     )
@@ -206,5 +199,10 @@ def delete_news_ajax(request, id):
     if not getattr(request.user, "is_admin", False):
         return HttpResponseForbidden("Admins only")
     obj = get_object_or_404(News, pk=id)
+    # cached pages listing it under "Berita Terkait" would link to a 404
+    linking = list(RelatedNews.objects.filter(related_id=obj.id).values_list("news_id", flat=True))
+    unindex_news([obj.id])
     obj.delete()
+    invalidate_news_caches()
+    invalidate_news_pages(id, *linking)
     return JsonResponse({"deleted": str(id)})